@@ -0,0 +1,205 @@
+"""
+Benchmark de ponta a ponta dos comandos de despesas.
+
+Executa `/summary`, `/total_splited`, `/save_monthly` e `/load_monthly` com
+um canal falso (mensagens de uma ou várias linhas, com linhas válidas,
+inválidas e conversa em proporções configuráveis) e um banco SQLite
+temporário, cobrindo leitura do histórico, análise, cálculo e gravação.
+
+Cada comando é medido "frio" (ledger do canal descartado antes de cada
+execução, como no primeiro uso do canal ou após uma reconexão) e "quente"
+(ledger já preenchido); o `/load_monthly` lê apenas o banco. Mostra
+comandos e linhas por segundo, percentis de latência e o pico de memória de
+uma execução.
+
+Uso:
+    python -m benchmarks.bench_expense_commands [--messages 500] [--max-lines 5] [--invalid 0.1]
+        [--chat 0.1] [--people 10] [--iterations 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, List
+import discord
+from commands.load_monthly import load_monthly
+from commands.save_monthly import save_monthly
+from commands.summary import summary
+from commands.total_splited import total_splited
+from database.database import Database
+from repositories.sqlite_expense_repository import SQLiteExpenseRepository
+from repositories.sqlite_split_repository import SQLiteSplitRepository
+from services.expense_service import ExpenseService
+from services.message_history_service import message_history_service
+
+GUILD_ID, CHANNEL_ID, MONTH, YEAR = 1, 1, 12, 2024
+
+@dataclass
+class FakeMessage:
+    id: int
+    content: str
+    author: SimpleNamespace
+    created_at: datetime
+
+class FakeChannel:
+    """Canal com histórico fixo, lido como o `TextChannel.history` (mais recentes primeiro)"""
+
+    def __init__(self, channel_id: int, messages: List[FakeMessage]):
+        self.id = channel_id
+        self.messages = messages
+
+    async def history(self, limit: int | None = None, after: discord.abc.Snowflake | None = None):
+        messages = self.messages if after is None else [message for message in self.messages if message.id > after.id]
+        for message in list(reversed(messages))[:limit]:
+            yield message
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, content=None, **kwargs):
+        raise RuntimeError(f"Comando recusado: {content}")
+
+class FakeFollowup:
+    def __init__(self):
+        self.replies: List[str] = []
+
+    async def send(self, content=None, **kwargs):
+        self.replies.append(content)
+
+def generate_messages(count: int, max_lines: int, invalid_ratio: float, chat_ratio: float, people: int, seed: int = 42) -> List[FakeMessage]:
+    """Mensagens de 1 a `max_lines` linhas; cada linha é válida, inválida ou conversa"""
+    rng = random.Random(seed)
+    names = [f"Pessoa {index}" for index in range(people)]
+    descriptions = ["Almoço", "Uber", "Internet Vencimento dia 10", "Mercado", "Cinema"]
+    start = datetime(YEAR, MONTH, 1)
+    messages = []
+
+    for index in range(count):
+        lines = []
+        for _ in range(rng.randint(1, max_lines)):
+            kind = rng.random()
+            if kind < invalid_ratio:
+                lines.append(f"- {rng.randint(1, 99)} {rng.choice(descriptions)} {rng.choice(names)}")
+            elif kind < invalid_ratio + chat_ratio:
+                lines.append("bom dia pessoal")
+            else:
+                value = f"{rng.uniform(1, 500):.2f}".replace('.', rng.choice(['.', ',']))
+                lines.append(f"- {value};{rng.choice(descriptions)};{rng.choice(names)}")
+        messages.append(FakeMessage(
+            id=index + 1,
+            content="\n".join(lines),
+            author=SimpleNamespace(display_name=rng.choice(names)),
+            created_at=start + timedelta(minutes=index)
+        ))
+
+    return messages
+
+def make_interaction(channel: FakeChannel, expense_service: ExpenseService) -> SimpleNamespace:
+    return SimpleNamespace(
+        guild_id=GUILD_ID,
+        channel_id=channel.id,
+        channel=channel,
+        response=FakeResponse(),
+        followup=FakeFollowup(),
+        client=SimpleNamespace(expense_service=expense_service)
+    )
+
+async def run_command(command, channel: FakeChannel, expense_service: ExpenseService, *args) -> None:
+    interaction = make_interaction(channel, expense_service)
+    await command.callback(interaction, *args)
+    # Os comandos tratam as exceções e respondem com a mensagem de erro
+    reply = interaction.followup.replies[-1] if interaction.followup.replies else None
+    if not reply or reply.startswith("Erro"):
+        raise RuntimeError(f"/{command.name} falhou: {reply}")
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def measure(run: Callable[[], object], iterations: int, cold: bool, channel_id: int) -> List[float]:
+    latencies = []
+    for _ in range(iterations):
+        if cold:
+            message_history_service.invalidate(channel_id)
+        start = time.perf_counter()
+        await run()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+async def peak_memory(run: Callable[[], object], cold: bool, channel_id: int) -> int:
+    if cold:
+        message_history_service.invalidate(channel_id)
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        await run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+async def run(args: argparse.Namespace) -> None:
+    messages = generate_messages(args.messages, args.max_lines, args.invalid, args.chat, args.people)
+    total_lines = sum(message.content.count("\n") + 1 for message in messages)
+    channel = FakeChannel(CHANNEL_ID, messages)
+    # Ler todas as mensagens geradas, mesmo acima do limite configurado do bot
+    message_history_service.history_limit = len(messages)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, "bench.db"))
+        await database.connect()
+        service = ExpenseService(SQLiteExpenseRepository(database), SQLiteSplitRepository(database), database)
+
+        try:
+            # (nome, execução, se lê o histórico do canal)
+            commands = [
+                ("summary", lambda: run_command(summary, channel, service), True),
+                ("total_splited", lambda: run_command(total_splited, channel, service), True),
+                ("save_monthly", lambda: run_command(save_monthly, channel, service, MONTH, YEAR), True),
+                ("load_monthly", lambda: run_command(load_monthly, channel, service, MONTH, YEAR), False),
+            ]
+            # O /load_monthly precisa de um mês salvo; a execução também aquece imports e caches
+            for _, command, _ in commands:
+                await command()
+
+            print(
+                f"{len(messages):,} mensagens, {total_lines:,} linhas "
+                f"(inválidas {args.invalid:.0%}, conversa {args.chat:.0%}), {args.people} pessoas, "
+                f"{args.iterations} execuções por comando\n"
+            )
+            print(
+                f"{'comando':<15} {'ledger':<7} {'cmd/s':>8} {'linhas/s':>12} "
+                f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'pico KiB':>9}"
+            )
+            for name, command, reads_history in commands:
+                for cold in ((True, False) if reads_history else (False,)):
+                    latencies = await measure(command, args.iterations, cold, channel.id)
+                    peak = await peak_memory(command, cold, channel.id)
+                    mean = sum(latencies) / len(latencies)
+                    print(
+                        f"{name:<15} {('frio' if cold else 'quente') if reads_history else '-':<7} {1 / mean:>8.1f} {total_lines / mean:>12,.0f} "
+                        f"{percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+                        f"{percentile(latencies, 0.99) * 1000:>8.1f} {peak / 1024:>9,.0f}"
+                    )
+        finally:
+            await database.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--max-lines", type=int, default=5, help="linhas por mensagem (máximo)")
+    parser.add_argument("--invalid", type=float, default=0.1, help="fração de linhas fora do padrão")
+    parser.add_argument("--chat", type=float, default=0.1, help="fração de linhas de conversa")
+    parser.add_argument("--people", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
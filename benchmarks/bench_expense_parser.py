@@ -0,0 +1,116 @@
+"""
+Micro-benchmark do parser de despesas.
+
+Compara a implementação anterior (dois strips por linha e um strip por
+campo) com o parser de `services.expense_parser`, que faz um único strip por
+linha, em linhas por segundo. O bot analisa uma mensagem por vez (ao ler o
+histórico e a cada evento), então a medição é por mensagem.
+
+Uso:
+    python -m benchmarks.bench_expense_parser [--lines 100000] [--repeat 10]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+from services.expense_parser import analyze_message_content
+
+def legacy_parse_expense_line(line: str) -> Tuple[float, str, str] | None:
+    """Implementação anterior, mantida apenas como referência de desempenho"""
+    line = line.strip()
+    if not line.startswith('-'):
+        return None
+
+    parts = line[1:].split(';')
+    if len(parts) != 3:
+        return None
+
+    try:
+        value_str, description, person = [part.strip() for part in parts]
+        value = float(value_str.replace(',', '.'))
+        return (value, description, person)
+    except (ValueError, IndexError):
+        return None
+
+def legacy_analyze_message_content(message_content: str) -> Tuple[List[Tuple[float, str, str]], List[str]]:
+    """Implementação anterior, mantida apenas como referência de desempenho"""
+    valid_expenses = []
+    invalid_lines = []
+
+    for line in message_content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        expense = legacy_parse_expense_line(line)
+        if expense:
+            valid_expenses.append(expense)
+        elif line.startswith('-') or ';' in line:
+            invalid_lines.append(line)
+
+    return valid_expenses, invalid_lines
+
+def generate_messages(total_lines: int, seed: int = 42) -> List[str]:
+    """Gera mensagens de 1 a 5 linhas, misturando linhas válidas, inválidas e conversa"""
+    rng = random.Random(seed)
+    people = ["João", "Maria", "Pedro", "Ana", "Lan"]
+    descriptions = ["Almoço", "Uber", "Internet Vencimento dia 10", "Mercado", "Cinema"]
+    messages = []
+    produced = 0
+
+    while produced < total_lines:
+        size = min(rng.randint(1, 5), total_lines - produced)
+        lines = []
+        for _ in range(size):
+            kind = rng.random()
+            if kind < 0.8:
+                value = f"{rng.uniform(1, 500):.2f}".replace('.', rng.choice(['.', ',']))
+                lines.append(f"- {value};{rng.choice(descriptions)};{rng.choice(people)}")
+            elif kind < 0.9:
+                lines.append(f"- {rng.randint(1, 99)} {rng.choice(descriptions)} {rng.choice(people)}")
+            else:
+                lines.append("bom dia pessoal")
+        messages.append("\n".join(lines))
+        produced += size
+
+    return messages
+
+def _measure(label: str, run: Callable[[], object], total_lines: int, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    rate = total_lines / best
+    print(f"{label:<32} {best * 1000:9.1f} ms {rate:14,.0f} linhas/s")
+    return rate
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.lines)
+
+    # Garantir que as implementações são equivalentes antes de medir
+    legacy_result = [legacy_analyze_message_content(content) for content in messages]
+    assert legacy_result == [analyze_message_content(content) for content in messages]
+
+    print(f"{len(messages):,} mensagens, {args.lines:,} linhas (melhor de {args.repeat})")
+    legacy = _measure(
+        "anterior (por mensagem)",
+        lambda: [legacy_analyze_message_content(content) for content in messages],
+        args.lines, args.repeat
+    )
+    current = _measure(
+        "atual (por mensagem)",
+        lambda: [analyze_message_content(content) for content in messages],
+        args.lines, args.repeat
+    )
+
+    print(f"\nGanho: {current / legacy:.2f}x")
+
+if __name__ == "__main__":
+    main()
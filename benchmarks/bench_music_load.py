@@ -0,0 +1,275 @@
+"""
+Teste de carga offline dos comandos de música.
+
+Simula N servidores usando `/add_song`, `/play_pause`, `/skip`, `/queue` e
+`/exit` ao mesmo tempo, sem Discord, YouTube nem ffmpeg: o canal de voz, o
+extrator do yt-dlp (com latência configurável), a fonte de áudio e a
+interação são substituídos por versões falsas. Ao final, mostra o atraso do
+event loop, os percentis de latência de cada comando e o crescimento de memória.
+
+Uso:
+    python -m benchmarks.bench_music_load [--guilds 200] [--rounds 3] [--extract-latency 0.2]
+        [--track-seconds 0.5] [--max-streams 50]
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Dict, List
+import discord
+from commands.play_song import add_song, exit, play_pause, queue, register_music_view, skip
+from services.audio_extraction_service import audio_extraction_service
+from services.music_player import music_players
+from services.playback_governor import playback_governor
+
+# Intervalo de amostragem do atraso do event loop, em segundos
+LAG_SAMPLE_INTERVAL = 0.01
+
+class StubAudioSource:
+    """Substitui o FFmpegOpusAudio: não inicia nenhum processo"""
+
+    def __init__(self, source, **kwargs):
+        self.source = source
+
+    @staticmethod
+    async def probe(source, **kwargs):
+        return 'opus', 128
+
+    def cleanup(self):
+        pass
+
+class StubVoiceClient:
+    """Canal de voz falso: cada faixa "toca" por `track_seconds` em um timer"""
+
+    def __init__(self, track_seconds: float):
+        self.track_seconds = track_seconds
+        self._connected = True
+        self._paused = False
+        self._source = None
+        self._timer: threading.Timer | None = None
+        self._after = None
+
+    def is_connected(self):
+        return self._connected
+
+    def is_playing(self):
+        return self._source is not None and not self._paused
+
+    def is_paused(self):
+        return self._source is not None and self._paused
+
+    def play(self, source, after=None):
+        if self._source is not None:
+            # Como no discord.py: dois play() seguidos indicam uma troca de faixa duplicada
+            raise discord.ClientException('Already playing audio.')
+        self._source, self._after, self._paused = source, after, False
+        self._timer = threading.Timer(self.track_seconds, self._finish)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._source is not None:
+            # O discord.py chama o `after` na thread do player de áudio
+            threading.Thread(target=self._finish, daemon=True).start()
+
+    async def disconnect(self, force: bool = False):
+        self._connected = False
+        if self._timer is not None:
+            self._timer.cancel()
+        self._source = None
+
+    def _finish(self):
+        after, self._after, self._source = self._after, None, None
+        if after is not None:
+            after(None)
+
+class StubMessage:
+    async def edit(self, **kwargs):
+        pass
+
+class StubChannel:
+    async def send(self, *args, **kwargs):
+        return StubMessage()
+
+class StubResponse:
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, *args, **kwargs):
+        pass
+
+class StubFollowup:
+    def __init__(self, replies: List[str]):
+        self.replies = replies
+
+    async def send(self, content=None, **kwargs):
+        self.replies.append(content)
+
+class StubGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.voice_client: StubVoiceClient | None = None
+
+def make_interaction(guild: StubGuild, track_seconds: float, replies: List[str]):
+    """Interação falsa com o mínimo usado pelos comandos de música"""
+    async def connect():
+        guild.voice_client = StubVoiceClient(track_seconds)
+        return guild.voice_client
+
+    voice = SimpleNamespace(channel=SimpleNamespace(connect=connect))
+    return SimpleNamespace(
+        guild=guild,
+        guild_id=guild.id,
+        channel=StubChannel(),
+        user=SimpleNamespace(voice=voice),
+        response=StubResponse(),
+        followup=StubFollowup(replies),
+        client=SimpleNamespace()
+    )
+
+def install_stubs(extract_latency: float) -> None:
+    def extract_sync(url: str) -> dict:
+        # Bloqueia a thread do pool como o yt-dlp faria
+        time.sleep(extract_latency)
+        video_id = url.rsplit('=', 1)[-1]
+        return {
+            'id': video_id,
+            'extractor_key': 'Youtube',
+            'title': f"Música {video_id}",
+            'webpage_url': url,
+            'url': f"https://stream.invalid/{video_id}?expire={int(time.time()) + 3600}",
+            'acodec': 'opus',
+            'duration': 180,
+        }
+
+    audio_extraction_service._extract_sync = extract_sync
+    discord.FFmpegOpusAudio = StubAudioSource
+    register_music_view(SimpleNamespace(add_view=lambda view: None))
+
+async def monitor_lag(samples: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+        samples.append(time.perf_counter() - start - LAG_SAMPLE_INTERVAL)
+
+async def timed(latencies: Dict[str, List[float]], name: str, coro) -> None:
+    start = time.perf_counter()
+    await coro
+    latencies[name].append(time.perf_counter() - start)
+
+async def simulate_guild(
+    guild_id: int,
+    args: argparse.Namespace,
+    latencies: Dict[str, List[float]],
+    replies: List[str],
+    rng: random.Random
+) -> None:
+    guild = StubGuild(guild_id)
+
+    def interaction():
+        return make_interaction(guild, args.track_seconds, replies)
+
+    for round_index in range(args.rounds):
+        for song in range(args.songs):
+            # Ids repetidos entre servidores exercitam o cache de faixas compartilhado
+            video_id = f"{rng.randrange(args.catalog):011d}"
+            url = f"https://www.youtube.com/watch?v={video_id}"
+            await timed(latencies, 'add_song', add_song.callback(interaction(), url))
+        await asyncio.sleep(rng.uniform(0, args.track_seconds))
+        if guild.voice_client is None:
+            continue
+        await timed(latencies, 'play_pause', play_pause.callback(interaction()))
+        await timed(latencies, 'play_pause', play_pause.callback(interaction()))
+        await timed(latencies, 'queue', queue.callback(interaction()))
+        await timed(latencies, 'skip', skip.callback(interaction()))
+        await asyncio.sleep(rng.uniform(0, args.track_seconds))
+
+    if guild.voice_client is not None:
+        await timed(latencies, 'exit', exit.callback(interaction()))
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(args: argparse.Namespace) -> None:
+    install_stubs(args.extract_latency)
+    playback_governor.max_streams = args.max_streams
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    replies: List[str] = []
+    lag_samples: List[float] = []
+    rng = random.Random(42)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(lag_samples, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_guild(guild_id, args, latencies, replies, random.Random(rng.random()))
+        for guild_id in range(1, args.guilds + 1)
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+
+    current, peak = tracemalloc.get_traced_memory()
+    players_left = len(music_players)
+    await music_players.remove_idle(now=float('inf'))
+    after_cleanup, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    audio_extraction_service.shutdown()
+
+    print(
+        f"{args.guilds} servidores, {args.rounds} rodadas de {args.songs} músicas, "
+        f"extração de {args.extract_latency * 1000:.0f} ms, limite de {args.max_streams} reproduções"
+    )
+    print(f"Tempo total: {elapsed:.2f} s\n")
+
+    print(f"{'comando':<12} {'chamadas':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for name, values in sorted(latencies.items()):
+        print(
+            f"{name:<12} {len(values):>9} {percentile(values, 0.50) * 1000:>9.1f} "
+            f"{percentile(values, 0.95) * 1000:>9.1f} {percentile(values, 0.99) * 1000:>9.1f} "
+            f"{max(values) * 1000:>9.1f}"
+        )
+
+    if lag_samples:
+        print(
+            f"\nAtraso do event loop: p50 {percentile(lag_samples, 0.50) * 1000:.2f} ms, "
+            f"p99 {percentile(lag_samples, 0.99) * 1000:.2f} ms, máx {max(lag_samples) * 1000:.2f} ms"
+        )
+
+    rejected = sum(1 for reply in replies if reply and reply.startswith("O bot já está tocando"))
+    print(f"Pedidos recusados por falta de vaga: {rejected}")
+    print(
+        f"Memória: +{(current - baseline) / 1024:.0f} KiB ao final (pico +{(peak - baseline) / 1024:.0f} KiB), "
+        f"+{(after_cleanup - baseline) / 1024:.0f} KiB após descartar {players_left} players ociosos"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--songs", type=int, default=3, help="músicas adicionadas por rodada")
+    parser.add_argument("--catalog", type=int, default=500, help="vídeos diferentes sorteados")
+    parser.add_argument("--extract-latency", type=float, default=0.2, help="segundos por extração")
+    parser.add_argument("--track-seconds", type=float, default=0.5, help="duração simulada de cada faixa")
+    parser.add_argument("--max-streams", type=int, default=playback_governor.max_streams)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark da gravação mensal (`ExpenseService.save_monthly_data`).
+
+Compara a gravação anterior (uma conexão por repositório, um `execute` por
+linha, duas transações) com a atual (pool de conexões, `executemany` e uma
+única transação), em linhas por segundo, usando um banco SQLite temporário.
+
+Uso:
+    python -m benchmarks.bench_save_monthly [--expenses 10000] [--people 20] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import List
+import aiosqlite
+from database.database import Database
+from models.expense import Expense
+from models.expense_batch import ExpenseBatch
+from models.split import Split
+from repositories.sqlite_expense_repository import SQLiteExpenseRepository
+from repositories.sqlite_split_repository import SQLiteSplitRepository
+from services.expense_service import ExpenseService
+
+GUILD_ID, CHANNEL_ID, MONTH, YEAR = 1, 1, 12, 2024
+
+def generate_expenses(count: int, people: int, seed: int = 42) -> ExpenseBatch:
+    rng = random.Random(seed)
+    names = [f"Pessoa {index}" for index in range(people)]
+    return ExpenseBatch.from_tuples(
+        (round(rng.uniform(1, 500), 2), f"Despesa {index}", rng.choice(names))
+        for index in range(count)
+    )
+
+async def legacy_save_monthly_data(db_path: str, service: ExpenseService, expenses_data: ExpenseBatch) -> None:
+    """Gravação anterior, mantida apenas como referência de desempenho"""
+    expenses = [
+        Expense(
+            id=None, value=value, description=description, paid_by=paid_by,
+            month=MONTH, year=YEAR, guild_id=GUILD_ID, channel_id=CHANNEL_ID
+        )
+        for value, description, paid_by in expenses_data
+    ]
+    splits: List[Split] = service._calculate_splits(expenses_data, GUILD_ID, CHANNEL_ID, MONTH, YEAR)
+
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.execute('DELETE FROM expenses WHERE month = ? AND year = ?', (MONTH, YEAR))
+        for expense in expenses:
+            await conn.execute('''
+                INSERT INTO expenses (value, description, paid_by, month, year, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (expense.value, expense.description, expense.paid_by, expense.month, expense.year, expense.created_at))
+        await conn.commit()
+
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.execute('DELETE FROM splits WHERE month = ? AND year = ?', (MONTH, YEAR))
+        for split in splits:
+            await conn.execute('''
+                INSERT INTO splits (debtor, creditor, amount, month, year, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (split.debtor, split.creditor, split.amount, split.month, split.year, split.created_at))
+        await conn.commit()
+
+async def run(args: argparse.Namespace) -> None:
+    expenses_data = generate_expenses(args.expenses, args.people)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        database = Database(db_path)
+        await database.connect()
+        service = ExpenseService(SQLiteExpenseRepository(database), SQLiteSplitRepository(database), database)
+
+        try:
+            rows = len(expenses_data) + len(service._calculate_splits(expenses_data, GUILD_ID, CHANNEL_ID, MONTH, YEAR))
+            print(f"{args.expenses:,} despesas, {args.people} pessoas, {rows:,} linhas por gravação (melhor de {args.repeat})")
+
+            results = {}
+            for label, save in (
+                ("anterior (linha a linha)", lambda: legacy_save_monthly_data(db_path, service, expenses_data)),
+                ("atual (executemany, 1 transação)", lambda: service.save_monthly_data(expenses_data, GUILD_ID, CHANNEL_ID, MONTH, YEAR)),
+            ):
+                best = float('inf')
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    await save()
+                    best = min(best, time.perf_counter() - start)
+                results[label] = rows / best
+                print(f"{label:<34} {best * 1000:9.1f} ms {rows / best:12,.0f} linhas/s")
+
+            legacy, current = results.values()
+            print(f"\nGanho: {current / legacy:.2f}x")
+        finally:
+            await database.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--expenses", type=int, default=10_000)
+    parser.add_argument("--people", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from .summary import summary
 from .total_splited import total_splited
 from .hello import hello
-from .play_song import add_song, play_pause, skip, queue, exit
+from .play_song import add_song, play_pause, skip, queue, exit, music_status, register_music_view
 from .save_monthly import save_monthly
 from .load_monthly import load_monthly
 
@@ -14,5 +14,10 @@ def register_commands(bot):
     bot.tree.add_command(skip)
     bot.tree.add_command(queue)
     bot.tree.add_command(exit)
+    bot.tree.add_command(music_status)
     bot.tree.add_command(save_monthly)
     bot.tree.add_command(load_monthly)
+
+def register_views(bot):
+    # Views persistentes precisam do event loop rodando (chamar no setup_hook)
+    register_music_view(bot)
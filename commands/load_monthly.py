@@ -1,12 +1,8 @@
 import discord
 from discord import app_commands
-from datetime import datetime
-from typing import List, Tuple
+from models.expense_batch import ExpenseBatch
 from services.expense_service import ExpenseService
 from services.calculation_service import CalculationService
-from repositories.sqlite_expense_repository import SQLiteExpenseRepository
-from repositories.sqlite_split_repository import SQLiteSplitRepository
-from config import DATABASE_PATH
 
 @app_commands.command(name="load_monthly", description="Carrega dados salvos de um mês específico.")
 async def load_monthly(interaction: discord.Interaction, month: int, year: int):
@@ -31,22 +27,20 @@ async def load_monthly(interaction: discord.Interaction, month: int, year: int):
         return
     
     try:
-        # Inicializar repositórios e serviço dentro da função
-        expense_repo = SQLiteExpenseRepository(DATABASE_PATH)
-        split_repo = SQLiteSplitRepository(DATABASE_PATH)
-        expense_service = ExpenseService(expense_repo, split_repo)
+        # Serviço criado na inicialização do bot, com o pool de conexões compartilhado
+        expense_service: ExpenseService = interaction.client.expense_service
         
-        summary = await expense_service.get_monthly_summary(month, year)
+        summary = await expense_service.get_monthly_summary(interaction.guild_id or 0, interaction.channel_id, month, year)
         
         if not summary['expenses']:
             await interaction.followup.send(f"Nenhum dado encontrado para {month:02d}/{year}.", ephemeral=True)
             return
         
         # Converter expenses para formato do CalculationService
-        expenses_data = [
+        expenses_data = ExpenseBatch.from_tuples(
             (expense.value, expense.description, expense.paid_by)
             for expense in summary['expenses']
-        ]
+        )
         
         # Usar o serviço de cálculos
         calculation = CalculationService.calculate_expenses(expenses_data)
@@ -2,70 +2,136 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ui import View, Button
-import yt_dlp
-import asyncio
+from itertools import islice
+from typing import List, Optional
+from urllib.parse import urlparse
+from services.audio_extraction_service import AudioExtractionError, audio_extraction_service, is_playlist_url
+from services.music_player import MusicPlayer, music_players
+from services.playback_governor import playback_governor
+from services.track_index_service import normalize_title
 
-# Fila de músicas por guild
-song_queues = {}
+# Quantidade máxima de músicas listadas ao mostrar a fila
+QUEUE_DISPLAY_LIMIT = 20
 
-# Histórico de músicas por guild (para skip back)
-song_history = {}
+def as_url(text: str) -> Optional[str]:
+    """
+    Link http(s) do texto, com o esquema completado quando falta
+    (`youtu.be/ID`, `www.youtube.com/watch?v=...`), ou None se não é um link.
 
-def get_song_queue(guild_id):
-    if guild_id not in song_queues:
-        song_queues[guild_id] = []
-    return song_queues[guild_id]
-
-def get_song_history(guild_id):
-    if guild_id not in song_history:
-        song_history[guild_id] = []
-    return song_history[guild_id]
+    Um link tem um host com domínio (ao menos um ponto e um sufixo só de
+    letras) e nenhum espaço; o resto é tratado como nome de uma música.
+    """
+    text = text.strip()
+    if not text or any(char.isspace() for char in text):
+        return None
+    if '://' not in text:
+        text = f"https://{text}"
+    try:
+        parsed = urlparse(text)
+        host = parsed.hostname
+    except ValueError:
+        return None
+    if parsed.scheme not in ('http', 'https') or not host or '.' not in host:
+        return None
+    suffix = host.rsplit('.', 1)[-1]
+    return text if len(suffix) >= 2 and suffix.isalpha() else None
 
 async def get_audio_url(youtube_url):
-    ydl_opts = {
-        'format': 'bestaudio[abr<=96]/bestaudio','quiet': True,
-        'noplaylist': True,
-        'youtube_include_dash_manifest': False,
-        'youtube_include_hls_manifest': False,
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(youtube_url, download=False)
-        return info['url'], info['title']
+    # A extração roda no pool de threads, sem bloquear o event loop, e fica
+    # em cache até o link de stream expirar
+    track = await audio_extraction_service.get_track(youtube_url)
+    return track.stream_url, track.title
+
+def format_queue(player: MusicPlayer) -> str:
+    if not player.queue:
+        return "A fila está vazia."
+    queue_text = "\n".join(
+        f"{idx+1}. {title}" for idx, (title, _) in enumerate(islice(player.queue, QUEUE_DISPLAY_LIMIT))
+    )
+    remaining = len(player.queue) - QUEUE_DISPLAY_LIMIT
+    if remaining > 0:
+        queue_text += f"\n... e mais {remaining} músicas"
+    return f"**Próximas músicas na fila:**\n{queue_text}"
 
 class MusicPlayerView(View):
-    def __init__(self, interaction, voice_client, queue, history):
+    """
+    Controles da mensagem "Tocando agora".
+
+    A view é persistente (sem timeout e com custom_ids fixos) e não guarda
+    estado: cada botão busca o player do servidor da interação. Uma única
+    instância é registrada na inicialização e reutilizada em todas as mensagens,
+    inclusive as enviadas antes de um reinício do bot.
+    """
+
+    def __init__(self):
         super().__init__(timeout=None)
-        self.interaction = interaction
-        self.voice_client = voice_client
-        self.queue = queue
-        self.history = history
 
-    @discord.ui.button(label="⏯️ Play/Pause", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="⏯️ Play/Pause", style=discord.ButtonStyle.primary, custom_id="music:play_pause")
     async def play_pause(self, interaction: discord.Interaction, button: Button):
-        if self.voice_client.is_playing():
-            self.voice_client.pause()
-        elif self.voice_client.is_paused():
-            self.voice_client.resume()
+        player = music_players.find(interaction.guild_id)
+        vc = player.voice_client if player else None
+        if vc and vc.is_playing():
+            player.pause()
+        elif vc and vc.is_paused():
+            player.resume()
+        else:
+            await interaction.response.send_message("Nenhuma música está tocando.", ephemeral=True)
+            return
         await interaction.response.defer()
 
-    @discord.ui.button(label="⏭️ Skip", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="⏭️ Skip", style=discord.ButtonStyle.secondary, custom_id="music:skip")
     async def skip(self, interaction: discord.Interaction, button: Button):
-        self.voice_client.stop()
+        player = music_players.find(interaction.guild_id)
+        if not player or not player.voice_client:
+            await interaction.response.send_message("Nenhuma música está tocando.", ephemeral=True)
+            return
+        player.voice_client.stop()
         await interaction.response.defer()
 
-    @discord.ui.button(label="📃 Queue", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="📃 Queue", style=discord.ButtonStyle.secondary, custom_id="music:queue")
     async def show_queue(self, interaction: discord.Interaction, button: Button):
-        if self.queue:
-            queue_titles = [title for _, title, _ in self.queue]
-            queue_text = "\n".join(f"{idx+1}. {title}" for idx, title in enumerate(queue_titles))
-            await interaction.response.send_message(
-                f"**Próximas músicas na fila:**\n{queue_text}", ephemeral=True
-            )
-        else:
+        player = music_players.find(interaction.guild_id)
+        if player is None:
             await interaction.response.send_message("A fila está vazia.", ephemeral=True)
+            return
+        await interaction.response.send_message(format_queue(player), ephemeral=True)
+
+# Instância única da view, criada em register_music_view
+music_player_view: MusicPlayerView | None = None
+
+def register_music_view(bot):
+    """Registra a view persistente do player; chamar uma vez, com o event loop rodando"""
+    global music_player_view
+    music_player_view = MusicPlayerView()
+    bot.add_view(music_player_view)
+
+async def announce_track(player: MusicPlayer, title: str):
+    # Uma única mensagem por servidor, editada a cada música
+    content = f"Tocando agora: **{title}**"
+    message = player.now_playing_message
+    if message is not None:
+        try:
+            await message.edit(content=content, view=music_player_view)
+            return
+        except discord.NotFound:
+            # A mensagem foi apagada; enviar outra
+            player.now_playing_message = None
+    if player.text_channel is not None:
+        player.now_playing_message = await player.text_channel.send(content, view=music_player_view)
+
+async def announce_stop(player: MusicPlayer):
+    message, player.now_playing_message = player.now_playing_message, None
+    if message is not None:
+        try:
+            await message.edit(content="Reprodução encerrada.", view=None)
+        except discord.NotFound:
+            pass
+
+music_players.on_track_start = announce_track
+music_players.on_stop = announce_stop
 
 @app_commands.command(name="add_song", description="Toque uma música do YouTube na call com fila e controles.")
-@app_commands.describe(url="Link do YouTube")
+@app_commands.describe(url="Link do YouTube (vídeo ou playlist) ou nome de uma música já tocada")
 async def add_song(interaction: discord.Interaction, url: str):
     await interaction.response.defer(ephemeral=False)
     user = interaction.user
@@ -73,56 +139,86 @@ async def add_song(interaction: discord.Interaction, url: str):
         await interaction.followup.send("Você precisa estar em um canal de voz!", ephemeral=True)
         return
 
-    queue = get_song_queue(interaction.guild.id)
-    history = get_song_history(interaction.guild.id)
-    # Armazene apenas o título e a URL original na fila
-    audio_url, title = await get_audio_url(url)
-    queue.append((title, url))
+    link = as_url(url)
+    if link is not None:
+        url = link
+    else:
+        # Nome digitado sem escolher uma sugestão: tocar a música já tocada mais parecida.
+        # Um texto sem letras nem números não é um nome (a busca vazia lista as mais tocadas).
+        matches = []
+        if normalize_title(url):
+            matches = await interaction.client.track_index_service.suggest(interaction.guild.id, url, limit=1)
+        if not matches:
+            await interaction.followup.send(
+                "Nenhuma música já tocada neste servidor corresponde a esse nome. Use um link do YouTube.",
+                ephemeral=True
+            )
+            return
+        _, url = matches[0]
+
+    # Sem vaga para tocar agora e sem lugar na espera: recusar antes de extrair qualquer coisa
+    must_wait = not playback_governor.can_admit(interaction.guild.id)
+    if must_wait and not playback_governor.can_wait():
+        await interaction.followup.send(
+            f"O bot já está tocando em {playback_governor.max_streams} servidores ao mesmo tempo. "
+            "Tente novamente em alguns minutos.",
+            ephemeral=True
+        )
+        return
+
+    if is_playlist_url(url):
+        # Enfileirar todos os vídeos de uma vez; os streams são resolvidos conforme a fila anda
+        try:
+            playlist_title, entries = await audio_extraction_service.extract_playlist(url)
+        except AudioExtractionError:
+            await interaction.followup.send("Não foi possível obter os vídeos dessa playlist.", ephemeral=True)
+            return
+        if not entries:
+            await interaction.followup.send("A playlist não tem vídeos disponíveis.", ephemeral=True)
+            return
+        added_message = f"Adicionadas à fila {len(entries)} músicas da playlist **{playlist_title}**"
+    else:
+        # Armazene apenas o título e a URL original na fila
+        try:
+            audio_url, title = await get_audio_url(url)
+        except AudioExtractionError:
+            await interaction.followup.send("Não foi possível obter o áudio desse link.", ephemeral=True)
+            return
+        entries = [(title, url)]
+        added_message = f"Adicionado à fila: **{title}**"
 
     if not interaction.guild.voice_client:
         vc = await user.voice.channel.connect()
     else:
         vc = interaction.guild.voice_client
 
-    await interaction.followup.send(f"Adicionado à fila: **{title}**", ephemeral=True)
+    player = music_players.get(interaction.guild.id)
+    player.text_channel = interaction.channel
+    player.voice_client = vc
+    player.queue.extend(entries)
+    player.touch()
 
-    bot = interaction.client
-    loop = bot.loop
+    if must_wait and not vc.is_playing() and not vc.is_paused():
+        added_message += "\nO bot está no limite de reproduções simultâneas; a música começa assim que houver vaga."
+    await interaction.followup.send(added_message, ephemeral=True)
 
-    if not vc.is_playing() and not vc.is_paused():
-        await play_next_song(interaction, vc, queue, history, loop)
-
-async def play_next_song(interaction, vc, queue, history, loop):
-    if not queue:
-        await vc.disconnect()
-        return
-    # Pegue o título e a URL original da fila
-    title, url = queue.pop(0)
-    # Re-extraia o link de áudio imediatamente antes de tocar
-    audio_url, _ = await get_audio_url(url)
-    history.append((title, url))
-    
-    ffmpeg_options = {
-        'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
-        'options': '-vn -c:a libopus -b:a 96k',
-    }
-    
-    source = await discord.FFmpegOpusAudio.from_probe(audio_url, **ffmpeg_options)
-
-    def after_playing(error):
-        fut = asyncio.run_coroutine_threadsafe(
-            play_next_song(interaction, vc, queue, history, loop),
-            loop
-        )
-        try:
-            fut.result()
-        except Exception as e:
-            print(f"Erro ao tocar próxima música: {e}")
+    # Com uma troca de faixa em andamento, ela mesma toca a primeira música da fila
+    if not vc.is_playing() and not vc.is_paused() and not player.is_starting:
+        await player.play_next()
+    else:
+        player.schedule_prefetch()
 
-    vc.play(source, after=after_playing)
-    view = MusicPlayerView(interaction, vc, queue, history)
-    coro = interaction.followup.send(f"Tocando agora: **{title}**", view=view, ephemeral=False)
-    asyncio.run_coroutine_threadsafe(coro, loop)
+@add_song.autocomplete('url')
+async def add_song_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    # Links colados não precisam de sugestão; o resto é buscado no índice local, sem ir ao YouTube
+    if interaction.guild_id is None or as_url(current) is not None:
+        return []
+    suggestions = await interaction.client.track_index_service.suggest(interaction.guild_id, current)
+    return [
+        app_commands.Choice(name=title[:100], value=url)
+        for title, url in suggestions
+        if len(url) <= 100
+    ][:25]
 
 @app_commands.command(name="play_pause", description="Alterna entre tocar e pausar a música.")
 async def play_pause(interaction: discord.Interaction):
@@ -130,11 +226,15 @@ async def play_pause(interaction: discord.Interaction):
     if not vc:
         await interaction.response.send_message("O bot não está em um canal de voz.", ephemeral=True)
         return
-    if vc.is_playing():
-        vc.pause()
+    # Pausar pelo player, que desconta o tempo pausado da posição da música
+    player = music_players.find(interaction.guild.id)
+    if player is None or player.voice_client is None:
+        await interaction.response.send_message("Nenhuma música está tocando.", ephemeral=True)
+    elif vc.is_playing():
+        player.pause()
         await interaction.response.send_message("Música pausada.", ephemeral=True)
     elif vc.is_paused():
-        vc.resume()
+        player.resume()
         await interaction.response.send_message("Música retomada.", ephemeral=True)
     else:
         await interaction.response.send_message("Nenhuma música está tocando.", ephemeral=True)
@@ -150,15 +250,11 @@ async def skip(interaction: discord.Interaction):
 
 @app_commands.command(name="queue", description="Mostra a fila de músicas.")
 async def queue(interaction: discord.Interaction):
-    queue = get_song_queue(interaction.guild.id)
-    if queue:
-        queue_titles = [title for _, title, _ in queue]
-        queue_text = "\n".join(f"{idx+1}. {title}" for idx, title in enumerate(queue_titles))
-        await interaction.response.send_message(
-            f"**Próximas músicas na fila:**\n{queue_text}", ephemeral=True
-        )
-    else:
+    player = music_players.find(interaction.guild.id)
+    if player is None:
         await interaction.response.send_message("A fila está vazia.", ephemeral=True)
+        return
+    await interaction.response.send_message(format_queue(player), ephemeral=True)
 
 @app_commands.command(name="exit", description="Remove o bot do canal de voz e limpa a fila.")
 async def exit(interaction: discord.Interaction):
@@ -166,7 +262,18 @@ async def exit(interaction: discord.Interaction):
     if not vc:
         await interaction.response.send_message("O bot não está em um canal de voz.", ephemeral=True)
         return
-    await vc.disconnect()
-    song_queues.pop(interaction.guild.id, None)
-    song_history.pop(interaction.guild.id, None)
-    await interaction.response.send_message("Bot removido do canal de voz e fila apagada.", ephemeral=True) 
\ No newline at end of file
+    await music_players.remove(interaction.guild.id)
+    if vc.is_connected():
+        await vc.disconnect()
+    await interaction.response.send_message("Bot removido do canal de voz e fila apagada.", ephemeral=True)
+
+@app_commands.command(name="music_status", description="Mostra a carga de reprodução de música do bot.")
+async def music_status(interaction: discord.Interaction):
+    load = playback_governor.load()
+    await interaction.response.send_message(
+        "**Carga de reprodução:**\n"
+        f"Servidores tocando: {load.active_streams}/{load.max_streams}\n"
+        f"Servidores aguardando vaga: {load.waiting_streams}/{load.max_waiting}\n"
+        f"Sondagens de áudio: {load.active_probes}/{load.max_probes} (aguardando: {load.waiting_probes})",
+        ephemeral=True
+    )
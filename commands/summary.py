@@ -1,109 +1,31 @@
 import discord
 from discord import app_commands
 from discord.ui import View, Button
-import openpyxl
 from io import BytesIO
-from config import MAX_MESSAGE_HISTORY
+from models.expense_batch import ExpenseBatch
 from services.excel_service import ExcelService
-from typing import Dict, List, Tuple, Optional
-from datetime import datetime
+from services.message_history_service import message_history_service
 
-def parse_expense_line(line: str) -> Tuple[float, str, str] | None:
-    """
-    Parse uma linha de despesa no formato: - Valor;Descrição;Pessoa
-    
-    Args:
-        line: Linha de texto a ser parseada
-        
-    Returns:
-        Tupla (valor, descrição, pessoa) ou None se inválida
-    """
-    line = line.strip()
-    if not line.startswith('-'):
-        return None
-    
-    # Remove o '-' inicial e divide por ';'
-    parts = line[1:].split(';')
-    if len(parts) != 3:
-        return None
-    
-    try:
-        value_str, description, person = [part.strip() for part in parts]
-        value = float(value_str.replace(',', '.'))
-        return (value, description, person)
-    except (ValueError, IndexError):
-        return None
-
-def extract_expenses_from_message(message_content: str) -> List[Tuple[float, str, str]]:
-    """
-    Extrai despesas de uma mensagem, suportando tanto formato individual quanto múltiplas linhas.
-    
-    Args:
-        message_content: Conteúdo da mensagem
-        
-    Returns:
-        Lista de tuplas (valor, descrição, pessoa)
-    """
-    expenses = []
-    lines = message_content.split('\n')
-    
-    for line in lines:
-        expense = parse_expense_line(line)
-        if expense:
-            expenses.append(expense)
-    
-    return expenses
-
-def analyze_message_content(message_content: str) -> Tuple[List[Tuple[float, str, str]], List[str]]:
-    """
-    Analisa o conteúdo de uma mensagem e retorna despesas válidas e linhas inválidas.
-    
-    Args:
-        message_content: Conteúdo da mensagem
-        
-    Returns:
-        Tupla (despesas_válidas, linhas_inválidas)
-    """
-    valid_expenses = []
-    invalid_lines = []
-    lines = message_content.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:  # Linha vazia
-            continue
-            
-        expense = parse_expense_line(line)
-        if expense:
-            valid_expenses.append(expense)
-        else:
-            # Verifica se a linha parece ser uma tentativa de despesa
-            if line.startswith('-') or ';' in line:
-                invalid_lines.append(line)
-    
-    return valid_expenses, invalid_lines
-
-def format_summary_by_person(expenses_by_person: Dict[str, List[Tuple[float, str, str]]]) -> str:
+def format_summary_by_person(expenses: ExpenseBatch) -> str:
     """
     Formata o resumo organizando por pessoa com totais.
     
     Args:
-        expenses_by_person: Dicionário com pessoa como chave e lista de despesas como valor
+        expenses: Lote de despesas
         
     Returns:
         Texto formatado do resumo
     """
     result_lines = []
+    totals = expenses.totals_by_person_cents()
+    indices_by_person = expenses.indices_by_person()
     
-    for person in sorted(expenses_by_person.keys()):
-        expenses = expenses_by_person[person]
-        total = sum(expense[0] for expense in expenses)
-        
-        result_lines.append(f"**{person}** (Total: R$ {total:.2f})")
+    for person in sorted(indices_by_person.keys()):
+        result_lines.append(f"**{person}** (Total: R$ {totals[person] / 100:.2f})")
         result_lines.append("```")
         
-        for value, description, _ in expenses:
-            result_lines.append(f"- R$ {value:.2f} | {description}")
+        for index in indices_by_person[person]:
+            result_lines.append(f"- R$ {expenses.cents[index] / 100:.2f} | {expenses.description(index)}")
         
         result_lines.append("```")
         result_lines.append("")  # Linha em branco entre pessoas
@@ -111,32 +33,22 @@ def format_summary_by_person(expenses_by_person: Dict[str, List[Tuple[float, str
     return "\n".join(result_lines)
 
 class ExcelExportView(View):
-    def __init__(self, expenses_by_person: Dict[str, List[Tuple[float, str, str]]]):
+    def __init__(self, expenses: ExpenseBatch):
         super().__init__(timeout=300)
-        self.expenses_by_person = expenses_by_person
+        self.expenses = expenses
 
     @discord.ui.button(label="Gerar .xlsx", style=discord.ButtonStyle.primary)
     async def generate_xlsx(self, interaction: discord.Interaction, button: Button):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # Converter para formato esperado pelo ExcelService
-            excel_data = {}
-            for person, expenses in self.expenses_by_person.items():
-                excel_data[person] = [f"- {value};{description};{person}" for value, description, _ in expenses]
-            
-            # Gerar arquivo Excel
+            # Gerar arquivo Excel em memória, fora do event loop
             excel_service = ExcelService()
-            file_path = excel_service.generate_expenses_excel(excel_data)
+            content = await excel_service.generate_expenses_excel_async(self.expenses)
             
             # Enviar arquivo
-            with open(file_path, 'rb') as f:
-                file = discord.File(f, filename="gastos.xlsx")
-                await interaction.followup.send("Arquivo Excel gerado com sucesso!", file=file, ephemeral=True)
-            
-            # Limpar arquivo temporário
-            import os
-            os.remove(file_path)
+            file = discord.File(BytesIO(content), filename="gastos.xlsx")
+            await interaction.followup.send("Arquivo Excel gerado com sucesso!", file=file, ephemeral=True)
             
         except Exception as e:
             try:
@@ -153,27 +65,24 @@ async def summary(interaction: discord.Interaction):
     
     try:
         channel = interaction.channel
-        expenses_by_person = {}
+        expenses = ExpenseBatch()
         invalid_messages = []
         total_invalid_lines = 0
         
-        async for message in channel.history(limit=MAX_MESSAGE_HISTORY):
-            # Analisar mensagem para despesas válidas e inválidas
-            valid_expenses, invalid_lines = analyze_message_content(message.content)
-            
+        # Mensagens já analisadas (apenas as novas são buscadas no canal)
+        messages = await message_history_service.get_messages(channel)
+        
+        for message in messages:
             # Processar despesas válidas
-            for value, description, person in valid_expenses:
-                if person not in expenses_by_person:
-                    expenses_by_person[person] = []
-                expenses_by_person[person].append((value, description, person))
+            expenses.extend(message.expenses)
             
             # Coletar mensagens com linhas inválidas
-            if invalid_lines:
-                total_invalid_lines += len(invalid_lines)
+            if message.invalid_lines:
+                total_invalid_lines += len(message.invalid_lines)
                 message_info = {
-                    'author': message.author.display_name,
+                    'author': message.author,
                     'timestamp': message.created_at.strftime("%d/%m/%Y %H:%M"),
-                    'invalid_lines': invalid_lines
+                    'invalid_lines': message.invalid_lines
                 }
                 invalid_messages.append(message_info)
         
@@ -200,7 +109,7 @@ async def summary(interaction: discord.Interaction):
             response_parts.append("---")
             response_parts.append("")
         
-        if not expenses_by_person:
+        if not expenses:
             if invalid_messages:
                 response_parts.append("❌ Nenhuma despesa válida encontrada.")
             else:
@@ -215,12 +124,12 @@ async def summary(interaction: discord.Interaction):
         response_parts.append("")
         
         # Formatar resumo por pessoa
-        summary_text = format_summary_by_person(expenses_by_person)
+        summary_text = format_summary_by_person(expenses)
         response_parts.append(summary_text)
         
         # Calcular totais gerais
-        total_expenses = sum(sum(expense[0] for expense in expenses) for expenses in expenses_by_person.values())
-        total_people = len(expenses_by_person)
+        total_expenses = expenses.total_cents() / 100
+        total_people = len(expenses.people)
         average_per_person = total_expenses / total_people if total_people > 0 else 0
         
         response_parts.append("**📊 Resumo Geral:**")
@@ -236,7 +145,7 @@ async def summary(interaction: discord.Interaction):
             await interaction.followup.send(
                 "📋 **Resumo muito extenso!** Use o botão abaixo para gerar um arquivo Excel com todos os detalhes.",
                 ephemeral=True,
-                view=ExcelExportView(expenses_by_person)
+                view=ExcelExportView(expenses)
             )
         else:
             # Adicionar botão para gerar Excel
@@ -246,7 +155,7 @@ async def summary(interaction: discord.Interaction):
             await interaction.followup.send(
                 "\n".join(response_parts),
                 ephemeral=True,
-                view=ExcelExportView(expenses_by_person)
+                view=ExcelExportView(expenses)
             )
         
     except Exception as e:
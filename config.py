@@ -7,6 +7,12 @@ load_dotenv()
 
 # Configurações do banco de dados
 DATABASE_PATH = os.getenv("DATABASE_PATH", "expenses.db")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "2"))
+
+# Um arquivo SQLite por servidor (gravações de servidores diferentes em paralelo)
+DATABASE_SHARD_BY_GUILD = os.getenv("DATABASE_SHARD_BY_GUILD", "false").lower() in ("1", "true", "yes")
+DATABASE_SHARD_DIR = os.getenv("DATABASE_SHARD_DIR", "guild_databases")
+DATABASE_MAX_OPEN_SHARDS = int(os.getenv("DATABASE_MAX_OPEN_SHARDS", "64"))
 
 # Configurações do bot
 BOT_TOKEN = os.getenv("BOT_TOKEN")
@@ -16,3 +22,44 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 # Configurações de limite de mensagens
 MAX_MESSAGE_HISTORY = int(os.getenv("MAX_MESSAGE_HISTORY", "500"))
+# Canais com o histórico analisado mantido em memória (os usados há mais tempo são descartados)
+MAX_HISTORY_CHANNELS = int(os.getenv("MAX_HISTORY_CHANNELS", "256"))
+
+# Cache dos relatórios Excel gerados (por conteúdo das despesas)
+EXCEL_CACHE_MAX_BYTES = int(os.getenv("EXCEL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+EXCEL_CACHE_TTL = float(os.getenv("EXCEL_CACHE_TTL", "600"))
+
+# Extração de áudio com yt-dlp (threads simultâneas e tempo limite em segundos)
+YTDL_MAX_WORKERS = int(os.getenv("YTDL_MAX_WORKERS", "4"))
+YTDL_EXTRACT_TIMEOUT = float(os.getenv("YTDL_EXTRACT_TIMEOUT", "30"))
+
+# Playlists: máximo de vídeos enfileirados e quantos são resolvidos à frente da fila
+PLAYLIST_MAX_ENTRIES = int(os.getenv("PLAYLIST_MAX_ENTRIES", "200"))
+QUEUE_RESOLVE_AHEAD = int(os.getenv("QUEUE_RESOLVE_AHEAD", "5"))
+
+# Player de música por servidor: tamanho do histórico e segundos parado até ser descartado
+MUSIC_HISTORY_SIZE = int(os.getenv("MUSIC_HISTORY_SIZE", "50"))
+MUSIC_IDLE_TIMEOUT = float(os.getenv("MUSIC_IDLE_TIMEOUT", "300"))
+
+# Sessões de música salvas no banco: segundos entre gravações e idade máxima para retomar
+MUSIC_SNAPSHOT_INTERVAL = float(os.getenv("MUSIC_SNAPSHOT_INTERVAL", "30"))
+MUSIC_RESTORE_MAX_AGE = float(os.getenv("MUSIC_RESTORE_MAX_AGE", "600"))
+
+# Sugestões do /add_song: músicas indexadas por servidor e servidores mantidos em memória
+TRACK_INDEX_MAX_TRACKS = int(os.getenv("TRACK_INDEX_MAX_TRACKS", "1000"))
+TRACK_INDEX_MAX_GUILDS = int(os.getenv("TRACK_INDEX_MAX_GUILDS", "256"))
+
+# Limites globais de reprodução: servidores tocando ao mesmo tempo (um ffmpeg cada),
+# servidores aguardando vaga e sondagens com ffprobe simultâneas
+PLAYBACK_MAX_STREAMS = int(os.getenv("PLAYBACK_MAX_STREAMS", "50"))
+PLAYBACK_MAX_WAITING = int(os.getenv("PLAYBACK_MAX_WAITING", "20"))
+PLAYBACK_MAX_PROBES = int(os.getenv("PLAYBACK_MAX_PROBES", "4"))
+
+# Cache das faixas extraídas (título e link de stream), por id do vídeo
+TRACK_CACHE_MAX_ENTRIES = int(os.getenv("TRACK_CACHE_MAX_ENTRIES", "1024"))
+TRACK_CACHE_TTL = float(os.getenv("TRACK_CACHE_TTL", "3600"))
+
+# Cache em disco das músicas tocadas (desativado se AUDIO_CACHE_DIR não for definido)
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR") or None
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+AUDIO_CACHE_MAX_DURATION = float(os.getenv("AUDIO_CACHE_MAX_DURATION", "1200"))
@@ -0,0 +1,134 @@
+import asyncio
+import aiosqlite
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List
+from database.migrations import apply_migrations
+
+# Aplicados a cada conexão do pool. O journal WAL permite leituras enquanto
+# uma gravação está em andamento e fica registrado no próprio arquivo.
+CONNECTION_PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA foreign_keys = ON',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA temp_store = MEMORY',
+]
+
+class Database:
+    """
+    Pool de conexões persistentes com o SQLite, compartilhado pelos repositórios.
+
+    As conexões (cada uma com sua thread do aiosqlite) são abertas uma vez na
+    inicialização do bot e reutilizadas por todos os comandos.
+    """
+
+    def __init__(self, db_path: str = "expenses.db", pool_size: int = 2):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._connections: List[aiosqlite.Connection] = []
+        self._pool: asyncio.Queue[aiosqlite.Connection] | None = None
+        # Conexão da transação em andamento na task atual, reutilizada por acquire()
+        self._transaction_conn: ContextVar[aiosqlite.Connection | None] = ContextVar(
+            f"transaction_conn_{id(self)}", default=None
+        )
+
+    async def connect(self) -> None:
+        """Abre as conexões do pool e aplica as migrações pendentes"""
+        if self._pool is not None:
+            return
+
+        pool: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        try:
+            for _ in range(self.pool_size):
+                conn = await aiosqlite.connect(self.db_path)
+                self._connections.append(conn)
+                for pragma in CONNECTION_PRAGMAS:
+                    await conn.execute(pragma)
+                pool.put_nowait(conn)
+
+            await apply_migrations(self._connections[0])
+        except BaseException:
+            await self._close_connections()
+            raise
+
+        self._pool = pool
+
+    async def close(self) -> None:
+        """Fecha todas as conexões do pool"""
+        if self._pool is None:
+            return
+
+        # Recusar novos empréstimos e aguardar que as conexões em uso sejam devolvidas
+        pool, self._pool = self._pool, None
+        for _ in range(len(self._connections)):
+            await pool.get()
+
+        await self._close_connections()
+
+    @asynccontextmanager
+    async def for_guild(self, guild_id: int) -> AsyncIterator["Database"]:
+        """Banco usado pelo servidor; com um único arquivo, é sempre este"""
+        yield self
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Empresta uma conexão do pool durante o bloco `async with`.
+
+        Dentro de `transaction()`, retorna a conexão da transação em andamento.
+
+        Yields:
+            Conexão aiosqlite pronta para uso
+        """
+        transaction_conn = self._transaction_conn.get()
+        if transaction_conn is not None:
+            yield transaction_conn
+            return
+
+        if self._pool is None:
+            raise RuntimeError("Banco de dados não conectado. Chame connect() antes de usar o pool.")
+
+        pool = self._pool
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            # Não devolver ao pool uma transação deixada aberta por um erro
+            if conn.in_transaction:
+                await conn.rollback()
+            pool.put_nowait(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Executa o bloco `async with` em uma única transação.
+
+        Repositórios chamados dentro do bloco usam a mesma conexão; tudo é
+        confirmado ao final ou desfeito se ocorrer um erro. Transações
+        aninhadas participam da transação externa.
+
+        Yields:
+            Conexão aiosqlite da transação
+        """
+        if self._transaction_conn.get() is not None:
+            async with self.acquire() as conn:
+                yield conn
+            return
+
+        async with self.acquire() as conn:
+            token = self._transaction_conn.set(conn)
+            try:
+                await conn.execute('BEGIN IMMEDIATE')
+                yield conn
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+            finally:
+                self._transaction_conn.reset(token)
+
+    async def _close_connections(self) -> None:
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
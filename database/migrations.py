@@ -0,0 +1,160 @@
+import aiosqlite
+from dataclasses import dataclass
+from typing import List
+
+@dataclass(frozen=True)
+class Migration:
+    """Alteração de schema identificada por uma versão sequencial"""
+    version: int
+    description: str
+    statements: List[str]
+
+# Servidor/canal dos registros gravados antes da migração 3, quando os dados
+# ainda não eram separados por servidor/canal
+LEGACY_SCOPE = (0, 0)
+
+# Migrações em ordem de versão. Nunca altere uma migração já publicada:
+# adicione uma nova com a próxima versão.
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Tabelas de despesas e splits",
+        statements=[
+            '''
+            CREATE TABLE IF NOT EXISTS expenses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                value REAL NOT NULL,
+                description TEXT NOT NULL,
+                paid_by TEXT NOT NULL,
+                month INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS splits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                debtor TEXT NOT NULL,
+                creditor TEXT NOT NULL,
+                amount REAL NOT NULL,
+                month INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+        ]
+    ),
+    Migration(
+        version=2,
+        description="Índices compostos por ano/mês",
+        statements=[
+            'CREATE INDEX IF NOT EXISTS idx_expenses_year_month ON expenses (year, month)',
+            'CREATE INDEX IF NOT EXISTS idx_splits_year_month ON splits (year, month)',
+        ]
+    ),
+    Migration(
+        version=3,
+        description="Despesas e splits particionados por servidor/canal",
+        statements=[
+            # Registros anteriores ficam no servidor/canal 0 (LEGACY_SCOPE)
+            'ALTER TABLE expenses ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0',
+            'ALTER TABLE expenses ADD COLUMN channel_id INTEGER NOT NULL DEFAULT 0',
+            'ALTER TABLE splits ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0',
+            'ALTER TABLE splits ADD COLUMN channel_id INTEGER NOT NULL DEFAULT 0',
+            'DROP INDEX IF EXISTS idx_expenses_year_month',
+            'DROP INDEX IF EXISTS idx_splits_year_month',
+            'CREATE INDEX idx_expenses_scope_month ON expenses (guild_id, channel_id, year, month)',
+            'CREATE INDEX idx_splits_scope_month ON splits (guild_id, channel_id, year, month)',
+        ]
+    ),
+    Migration(
+        version=4,
+        description="Músicas tocadas por servidor (sugestões do /add_song)",
+        statements=[
+            '''
+            CREATE TABLE played_tracks (
+                guild_id INTEGER NOT NULL,
+                video_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                play_count INTEGER NOT NULL DEFAULT 0,
+                last_played_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (guild_id, video_id)
+            )
+            ''',
+        ]
+    ),
+    Migration(
+        version=5,
+        description="Sessões de música salvas para retomar após um reinício",
+        statements=[
+            '''
+            CREATE TABLE music_sessions (
+                guild_id INTEGER PRIMARY KEY,
+                voice_channel_id INTEGER NOT NULL,
+                text_channel_id INTEGER,
+                now_playing_message_id INTEGER,
+                current_title TEXT,
+                current_url TEXT,
+                position REAL NOT NULL DEFAULT 0,
+                paused INTEGER NOT NULL DEFAULT 0,
+                queue TEXT NOT NULL,
+                saved_at TIMESTAMP NOT NULL
+            )
+            ''',
+        ]
+    ),
+]
+
+async def apply_migrations(conn: aiosqlite.Connection, migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Aplica, em ordem, as migrações ainda não registradas no banco.
+
+    Cada migração roda em sua própria transação junto com o registro da versão,
+    então uma falha não deixa o schema pela metade.
+
+    Args:
+        conn: Conexão com o banco
+        migrations: Migrações conhecidas, em ordem crescente de versão
+
+    Returns:
+        Versões aplicadas nesta execução
+    """
+    versions = [migration.version for migration in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError("As versões das migrações devem ser únicas e crescentes.")
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    await conn.commit()
+
+    cursor = await conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')
+    row = await cursor.fetchone()
+    current_version = row[0] if row else 0
+
+    applied = []
+    for migration in migrations:
+        if migration.version <= current_version:
+            continue
+
+        await conn.execute('BEGIN IMMEDIATE')
+        try:
+            for statement in migration.statements:
+                await conn.execute(statement)
+            await conn.execute(
+                'INSERT INTO schema_migrations (version, description) VALUES (?, ?)',
+                (migration.version, migration.description)
+            )
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
+        applied.append(migration.version)
+
+    return applied
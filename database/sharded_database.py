@@ -0,0 +1,99 @@
+import asyncio
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+from database.database import Database
+from services.cache import InFlight
+
+class ShardedDatabase:
+    """
+    Um arquivo SQLite por servidor, abertos sob demanda.
+
+    Cada servidor tem seu próprio lock de escrita, então gravações de servidores
+    diferentes não se bloqueiam. Os bancos abertos ficam em um cache LRU limitado
+    a `max_open`; ao exceder o limite, o banco sem uso há mais tempo é fechado.
+    """
+
+    def __init__(self, shard_dir: str, max_open: int = 64, pool_size: int = 1):
+        self.shard_dir = shard_dir
+        self.max_open = max_open
+        self.pool_size = pool_size
+        self._open: OrderedDict[int, Database] = OrderedDict()
+        self._opening: InFlight[int, Database] = InFlight()
+        # Quantos blocos `for_guild` estão usando cada banco (não podem ser fechados)
+        self._leases: Dict[int, int] = {}
+
+    async def connect(self) -> None:
+        """Prepara o diretório dos bancos; cada banco é aberto no primeiro uso"""
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+    async def close(self) -> None:
+        """Fecha todos os bancos abertos"""
+        await asyncio.gather(*self._opening.futures(), return_exceptions=True)
+
+        while self._open:
+            _, database = self._open.popitem(last=False)
+            await database.close()
+
+    @asynccontextmanager
+    async def for_guild(self, guild_id: int) -> AsyncIterator[Database]:
+        """
+        Empresta o banco do servidor durante o bloco `async with`, abrindo-o
+        (e aplicando as migrações) se necessário.
+
+        Args:
+            guild_id: Id do servidor
+
+        Yields:
+            Pool de conexões do banco do servidor
+        """
+        database = await self._get(guild_id)
+        self._leases[guild_id] = self._leases.get(guild_id, 0) + 1
+        try:
+            yield database
+        finally:
+            self._leases[guild_id] -= 1
+            if not self._leases[guild_id]:
+                del self._leases[guild_id]
+                # Fechar bancos que excederam o limite enquanto estavam em uso
+                await self._evict()
+
+    def shard_path(self, guild_id: int) -> str:
+        return os.path.join(self.shard_dir, f"guild_{guild_id}.db")
+
+    async def _get(self, guild_id: int) -> Database:
+        while True:
+            database = self._open.get(guild_id)
+            if database is not None:
+                self._open.move_to_end(guild_id)
+                return database
+
+            # Chamadas simultâneas para o mesmo servidor aguardam a mesma abertura
+            await self._opening.run(guild_id, lambda: self._open_shard(guild_id))
+            # O banco pode ter sido despejado antes desta task retomar; nesse caso, reabrir
+
+    async def _open_shard(self, guild_id: int) -> Database:
+        database = Database(self.shard_path(guild_id), pool_size=self.pool_size)
+        await database.connect()
+
+        self._open[guild_id] = database
+        await self._evict(keep=guild_id)
+        return database
+
+    async def _evict(self, keep: int | None = None) -> None:
+        while len(self._open) > self.max_open:
+            # Bancos em uso não são fechados; o limite pode ser excedido
+            # temporariamente até que fiquem ociosos
+            idle = next(
+                (
+                    guild_id for guild_id in self._open
+                    if guild_id != keep and guild_id not in self._leases
+                ),
+                None
+            )
+            if idle is None:
+                return
+
+            database = self._open.pop(idle)
+            await database.close()
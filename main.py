@@ -1,28 +1,130 @@
+import asyncio
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-from config import BOT_TOKEN
-from commands import register_commands
+from config import (
+    BOT_TOKEN,
+    DATABASE_PATH,
+    DATABASE_POOL_SIZE,
+    DATABASE_SHARD_BY_GUILD,
+    DATABASE_SHARD_DIR,
+    DATABASE_MAX_OPEN_SHARDS,
+    MUSIC_SNAPSHOT_INTERVAL,
+    MUSIC_RESTORE_MAX_AGE,
+    TRACK_INDEX_MAX_TRACKS,
+    TRACK_INDEX_MAX_GUILDS
+)
+from commands import register_commands, register_views
+from database.database import Database
+from database.sharded_database import ShardedDatabase
+from repositories.sqlite_expense_repository import SQLiteExpenseRepository
+from repositories.sqlite_music_session_repository import SQLiteMusicSessionRepository
+from repositories.sqlite_split_repository import SQLiteSplitRepository
+from repositories.sqlite_track_repository import SQLiteTrackRepository
+from services.audio_extraction_service import audio_extraction_service
+from services.audio_file_cache import audio_file_cache
+from services.expense_service import ExpenseService
+from services.message_history_service import message_history_service
+from services.music_player import music_players
+from services.music_session_service import MusicSessionService
+from services.track_index_service import TrackIndexService
 
 load_dotenv()
 
 intents = discord.Intents.all()
 bot = commands.Bot(command_prefix='!', intents=intents)
 
+# Pool de conexões e serviços compartilhados por todos os comandos
+if DATABASE_SHARD_BY_GUILD:
+    database = ShardedDatabase(DATABASE_SHARD_DIR, max_open=DATABASE_MAX_OPEN_SHARDS, pool_size=DATABASE_POOL_SIZE)
+else:
+    database = Database(DATABASE_PATH, pool_size=DATABASE_POOL_SIZE)
+bot.expense_service = ExpenseService(
+    SQLiteExpenseRepository(database),
+    SQLiteSplitRepository(database),
+    database
+)
+bot.track_index_service = TrackIndexService(
+    SQLiteTrackRepository(database),
+    TRACK_INDEX_MAX_TRACKS,
+    TRACK_INDEX_MAX_GUILDS
+)
+music_players.track_index = bot.track_index_service
+bot.music_session_service = MusicSessionService(
+    SQLiteMusicSessionRepository(database),
+    music_players,
+    MUSIC_SNAPSHOT_INTERVAL,
+    MUSIC_RESTORE_MAX_AGE
+)
+
+@bot.event
+async def setup_hook():
+    await database.connect()
+    music_players.start()
+    bot.music_session_service.start()
+    register_views(bot)
+
 @bot.event
 async def on_ready():
     print(f'{bot.user} está online!')
+    # Eventos podem ter sido perdidos desde a última conexão
+    message_history_service.mark_stale()
     try:
         synced = await bot.tree.sync()
         print(f"Sincronizados {len(synced)} comandos de barra.")
     except Exception as e:
         print(f"Erro ao sincronizar comandos de barra: {e}")
+    # Retomar as filas de música salvas antes do reinício (só na primeira conexão)
+    restored = await bot.music_session_service.restore(bot.guilds)
+    if restored:
+        print(f"Retomada a música em {restored} servidores.")
+
+@bot.event
+async def on_message(message: discord.Message):
+    message_history_service.apply_message(message)
+    await bot.process_commands(message)
+
+@bot.event
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent):
+    content = payload.data.get('content')
+    if content is not None:
+        message_history_service.apply_edit(payload.channel_id, payload.message_id, content)
+
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    message_history_service.apply_delete(payload.channel_id, [payload.message_id])
+
+@bot.event
+async def on_raw_bulk_message_delete(payload: discord.RawBulkMessageDeleteEvent):
+    message_history_service.apply_delete(payload.channel_id, payload.message_ids)
+
+@bot.event
+async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    # No desligamento as filas são mantidas para serem salvas e retomadas no próximo início
+    if bot.is_closed():
+        return
+    # O bot saiu (ou foi removido) da call: descartar a fila e o histórico do servidor
+    if member.id == bot.user.id and before.channel is not None and after.channel is None:
+        await music_players.remove(member.guild.id)
 
 register_commands(bot)
 
+async def run_bot():
+    try:
+        async with bot:
+            await bot.start(BOT_TOKEN)
+    finally:
+        await bot.music_session_service.close()
+        await music_players.close()
+        audio_extraction_service.shutdown()
+        await audio_file_cache.close()
+        await bot.track_index_service.close()
+        await database.close()
+
 if __name__ == "__main__":
     if not BOT_TOKEN:
         print("Erro: BOT_TOKEN não encontrado nas variáveis de ambiente.")
         exit(1)
     
-    bot.run(BOT_TOKEN)
+    discord.utils.setup_logging()
+    asyncio.run(run_bot())
@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+@dataclass(frozen=True)
+class AudioTrack:
+    video_id: str
+    title: str
+    webpage_url: str
+    stream_url: str
+    acodec: Optional[str] = None
+    duration: Optional[float] = None
+
+    @classmethod
+    def from_info(cls, info: Dict[str, Any]) -> "AudioTrack":
+        """Cria a faixa a partir do dicionário de informações do yt-dlp"""
+        return cls(
+            video_id=f"{info.get('extractor_key', 'generic').lower()}:{info['id']}",
+            title=info['title'],
+            webpage_url=info.get('webpage_url') or info['url'],
+            stream_url=info['url'],
+            acodec=info.get('acodec'),
+            duration=info.get('duration')
+        )
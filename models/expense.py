@@ -10,6 +10,8 @@ class Expense:
     paid_by: str
     month: int
     year: int
+    guild_id: int
+    channel_id: int
     created_at: Optional[datetime] = None
     
     def __post_init__(self):
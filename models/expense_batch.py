@@ -0,0 +1,103 @@
+import hashlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Maior valor, em centavos, que cabe no array de valores (inteiros de 64 bits)
+MAX_CENTS = 2**63 - 1
+
+# Maior valor, em reais, aceito em uma despesa: convertido para centavos, cabe
+# em MAX_CENTS com folga para o arredondamento do float
+MAX_VALUE = 9e16
+
+class ExpenseBatch:
+    """
+    Lote de despesas armazenado em colunas.
+
+    Os valores ficam em centavos em um array contíguo, cada pessoa é
+    internada uma única vez (as linhas guardam apenas o índice dela) e as
+    descrições são concatenadas em um único texto, acessado por offsets.
+    """
+
+    __slots__ = ('cents', 'person_ids', 'people', '_person_index', '_description_parts', '_description_offsets')
+
+    def __init__(self):
+        self.cents = array('q')
+        self.person_ids = array('L')
+        self.people: List[str] = []
+        self._person_index: Dict[str, int] = {}
+        self._description_parts: List[str] = []
+        self._description_offsets = array('L', [0])
+
+    @classmethod
+    def from_tuples(cls, expenses: Iterable[Tuple[float, str, str]]) -> "ExpenseBatch":
+        """Cria um lote a partir de tuplas (valor, descrição, pessoa)"""
+        batch = cls()
+        batch.extend(expenses)
+        return batch
+
+    def append(self, cents: int, description: str, person: str) -> None:
+        """Adiciona uma despesa com valor em centavos"""
+        person_id = self._person_index.get(person)
+        if person_id is None:
+            person_id = self._person_index[person] = len(self.people)
+            self.people.append(person)
+
+        self.cents.append(cents)
+        self.person_ids.append(person_id)
+        self._description_parts.append(description)
+        self._description_offsets.append(self._description_offsets[-1] + len(description))
+
+    def extend(self, expenses: Iterable[Tuple[float, str, str]]) -> None:
+        """Adiciona tuplas (valor, descrição, pessoa), com valor em reais"""
+        for value, description, person in expenses:
+            self.append(round(value * 100), description, person)
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    def __iter__(self) -> Iterator[Tuple[float, str, str]]:
+        """Percorre as despesas como tuplas (valor, descrição, pessoa)"""
+        text = self._description_text()
+        offsets = self._description_offsets
+        people = self.people
+        for index, (cents, person_id) in enumerate(zip(self.cents, self.person_ids)):
+            yield cents / 100, text[offsets[index]:offsets[index + 1]], people[person_id]
+
+    def description(self, index: int) -> str:
+        """Descrição da despesa na posição `index`"""
+        return self._description_text()[self._description_offsets[index]:self._description_offsets[index + 1]]
+
+    def total_cents(self) -> int:
+        """Soma de todas as despesas em centavos"""
+        return sum(self.cents)
+
+    def totals_by_person_cents(self) -> Dict[str, int]:
+        """Total de cada pessoa em centavos, em uma única passada pelos arrays"""
+        totals = [0] * len(self.people)
+        for person_id, cents in zip(self.person_ids, self.cents):
+            totals[person_id] += cents
+        return dict(zip(self.people, totals))
+
+    def indices_by_person(self) -> Dict[str, List[int]]:
+        """Posições das despesas de cada pessoa, na ordem em que foram adicionadas"""
+        indices: List[List[int]] = [[] for _ in self.people]
+        for index, person_id in enumerate(self.person_ids):
+            indices[person_id].append(index)
+        return dict(zip(self.people, indices))
+
+    def content_hash(self) -> str:
+        """Hash SHA-256 do conteúdo do lote (mesmas despesas, na mesma ordem, geram o mesmo hash)"""
+        digest = hashlib.sha256()
+        digest.update(self.cents.tobytes())
+        digest.update(self.person_ids.tobytes())
+        digest.update(self._description_offsets.tobytes())
+        digest.update('\0'.join(self.people).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(self._description_text().encode('utf-8'))
+        return digest.hexdigest()
+
+    def _description_text(self) -> str:
+        # Concatenar as descrições pendentes uma única vez, sob demanda
+        if len(self._description_parts) != 1:
+            self._description_parts = [''.join(self._description_parts)]
+        return self._description_parts[0]
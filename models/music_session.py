@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+@dataclass
+class MusicSession:
+    """Estado de música de um servidor salvo para ser retomado após um reinício"""
+    guild_id: int
+    voice_channel_id: int
+    text_channel_id: Optional[int] = None
+    now_playing_message_id: Optional[int] = None
+    # (título, url original) da música que estava tocando e segundos já tocados
+    current: Optional[Tuple[str, str]] = None
+    position: float = 0.0
+    paused: bool = False
+    queue: List[Tuple[str, str]] = field(default_factory=list)
+    saved_at: Optional[datetime] = None
+
+    def __post_init__(self):
+        if self.saved_at is None:
+            self.saved_at = datetime.now()
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+@dataclass
+class PlayedTrack:
+    guild_id: int
+    video_id: str
+    title: str
+    url: str
+    play_count: int = 1
+    last_played_at: Optional[datetime] = None
+    
+    def __post_init__(self):
+        if self.last_played_at is None:
+            self.last_played_at = datetime.now()
@@ -10,6 +10,8 @@ class Split:
     amount: float
     month: int
     year: int
+    guild_id: int
+    channel_id: int
     created_at: Optional[datetime] = None
     
     def __post_init__(self):
@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+from models.music_session import MusicSession
+
+class MusicSessionRepository(ABC):
+    @abstractmethod
+    async def save_session(self, session: MusicSession) -> None:
+        """Salva a sessão de música do servidor, substituindo a anterior"""
+        pass
+
+    @abstractmethod
+    async def get_session(self, guild_id: int) -> Optional[MusicSession]:
+        """Busca a sessão de música salva do servidor"""
+        pass
+
+    @abstractmethod
+    async def delete_session(self, guild_id: int) -> None:
+        """Apaga a sessão de música salva do servidor"""
+        pass
@@ -5,15 +5,15 @@ from models.split import Split
 class SplitRepository(ABC):
     @abstractmethod
     async def save_splits(self, splits: List[Split]) -> None:
-        """Salva uma lista de splits, sobrescrevendo os existentes do mesmo mês/ano"""
+        """Salva uma lista de splits, sobrescrevendo os existentes do mesmo servidor/canal/mês/ano"""
         pass
     
     @abstractmethod
-    async def get_splits_by_month(self, month: int, year: int) -> List[Split]:
-        """Busca splits por mês e ano"""
+    async def get_splits_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> List[Split]:
+        """Busca splits de um servidor/canal por mês e ano"""
         pass
     
     @abstractmethod
-    async def delete_splits_by_month(self, month: int, year: int) -> None:
-        """Remove todos os splits de um mês/ano específico"""
+    async def delete_splits_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> None:
+        """Remove todos os splits de um servidor/canal em um mês/ano específico"""
         pass
@@ -1,71 +1,55 @@
-import sqlite3
-import aiosqlite
 from typing import List
 from datetime import datetime
+from database.database import Database
+from database.sharded_database import ShardedDatabase
 from models.expense import Expense
 from .expense_repository import ExpenseRepository
 
 class SQLiteExpenseRepository(ExpenseRepository):
-    def __init__(self, db_path: str = "expenses.db"):
-        self.db_path = db_path
-    
-    async def _init_db(self) -> None:
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS expenses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    value REAL NOT NULL,
-                    description TEXT NOT NULL,
-                    paid_by TEXT NOT NULL,
-                    month INTEGER NOT NULL,
-                    year INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            await conn.commit()
+    def __init__(self, database: Database | ShardedDatabase):
+        self.database = database
     
     async def save_expenses(self, expenses: List[Expense]) -> None:
         if not expenses:
             return
         
-        # Usar o primeiro expense para determinar mês/ano
-        month, year = expenses[0].month, expenses[0].year
+        # Usar o primeiro expense para determinar servidor/canal/mês/ano
+        first = expenses[0]
+        guild_id, channel_id, month, year = first.guild_id, first.channel_id, first.month, first.year
         
-        async with aiosqlite.connect(self.db_path) as conn:
-            await self._init_db()
-            
-            # Remover despesas existentes do mesmo mês/ano
+        async with self.database.for_guild(guild_id) as database, database.transaction() as conn:
+            # Remover despesas existentes do mesmo servidor/canal/mês/ano
             await conn.execute(
-                'DELETE FROM expenses WHERE month = ? AND year = ?',
-                (month, year)
+                'DELETE FROM expenses WHERE guild_id = ? AND channel_id = ? AND year = ? AND month = ?',
+                (guild_id, channel_id, year, month)
             )
-            
-            # Inserir novas despesas
-            for expense in expenses:
-                await conn.execute('''
-                    INSERT INTO expenses (value, description, paid_by, month, year, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
+
+            # Inserir novas despesas em lote
+            await conn.executemany('''
+                INSERT INTO expenses (value, description, paid_by, month, year, guild_id, channel_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
                     expense.value,
                     expense.description,
                     expense.paid_by,
                     expense.month,
                     expense.year,
+                    expense.guild_id,
+                    expense.channel_id,
                     expense.created_at
-                ))
-            
-            await conn.commit()
+                )
+                for expense in expenses
+            ])
     
-    async def get_expenses_by_month(self, month: int, year: int) -> List[Expense]:
-        async with aiosqlite.connect(self.db_path) as conn:
-            await self._init_db()
-            
+    async def get_expenses_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> List[Expense]:
+        async with self.database.for_guild(guild_id) as database, database.acquire() as conn:
             cursor = await conn.execute('''
-                SELECT id, value, description, paid_by, month, year, created_at
+                SELECT id, value, description, paid_by, month, year, guild_id, channel_id, created_at
                 FROM expenses
-                WHERE month = ? AND year = ?
+                WHERE guild_id = ? AND channel_id = ? AND year = ? AND month = ?
                 ORDER BY created_at
-            ''', (month, year))
+            ''', (guild_id, channel_id, year, month))
             
             rows = await cursor.fetchall()
             return [
@@ -76,16 +60,16 @@ class SQLiteExpenseRepository(ExpenseRepository):
                     paid_by=row[3],
                     month=row[4],
                     year=row[5],
-                    created_at=datetime.fromisoformat(row[6]) if row[6] else None
+                    guild_id=row[6],
+                    channel_id=row[7],
+                    created_at=datetime.fromisoformat(row[8]) if row[8] else None
                 )
                 for row in rows
             ]
     
-    async def delete_expenses_by_month(self, month: int, year: int) -> None:
-        async with aiosqlite.connect(self.db_path) as conn:
-            await self._init_db()
+    async def delete_expenses_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> None:
+        async with self.database.for_guild(guild_id) as database, database.transaction() as conn:
             await conn.execute(
-                'DELETE FROM expenses WHERE month = ? AND year = ?',
-                (month, year)
+                'DELETE FROM expenses WHERE guild_id = ? AND channel_id = ? AND year = ? AND month = ?',
+                (guild_id, channel_id, year, month)
             )
-            await conn.commit()
@@ -0,0 +1,68 @@
+import json
+import os
+from datetime import datetime
+from typing import Optional
+from database.database import Database
+from database.sharded_database import ShardedDatabase
+from models.music_session import MusicSession
+from .music_session_repository import MusicSessionRepository
+
+class SQLiteMusicSessionRepository(MusicSessionRepository):
+    def __init__(self, database: Database | ShardedDatabase):
+        self.database = database
+
+    async def save_session(self, session: MusicSession) -> None:
+        title, url = session.current if session.current else (None, None)
+
+        async with self.database.for_guild(session.guild_id) as database, database.transaction() as conn:
+            await conn.execute('''
+                INSERT OR REPLACE INTO music_sessions (
+                    guild_id, voice_channel_id, text_channel_id, now_playing_message_id,
+                    current_title, current_url, position, paused, queue, saved_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                session.guild_id,
+                session.voice_channel_id,
+                session.text_channel_id,
+                session.now_playing_message_id,
+                title,
+                url,
+                session.position,
+                int(session.paused),
+                # A fila vai em uma única coluna: é sempre lida e gravada inteira
+                json.dumps(session.queue),
+                session.saved_at
+            ))
+
+    async def get_session(self, guild_id: int) -> Optional[MusicSession]:
+        if isinstance(self.database, ShardedDatabase) and not os.path.exists(self.database.shard_path(guild_id)):
+            # Servidor sem banco próprio: nada salvo, e não vale criar o arquivo só para consultar
+            return None
+
+        async with self.database.for_guild(guild_id) as database, database.acquire() as conn:
+            cursor = await conn.execute('''
+                SELECT guild_id, voice_channel_id, text_channel_id, now_playing_message_id,
+                       current_title, current_url, position, paused, queue, saved_at
+                FROM music_sessions
+                WHERE guild_id = ?
+            ''', (guild_id,))
+
+            row = await cursor.fetchone()
+            if row is None:
+                return None
+            return MusicSession(
+                guild_id=row[0],
+                voice_channel_id=row[1],
+                text_channel_id=row[2],
+                now_playing_message_id=row[3],
+                current=(row[4], row[5]) if row[5] else None,
+                position=row[6],
+                paused=bool(row[7]),
+                queue=[(title, url) for title, url in json.loads(row[8])],
+                saved_at=datetime.fromisoformat(row[9]) if row[9] else None
+            )
+
+    async def delete_session(self, guild_id: int) -> None:
+        async with self.database.for_guild(guild_id) as database, database.transaction() as conn:
+            await conn.execute('DELETE FROM music_sessions WHERE guild_id = ?', (guild_id,))
@@ -1,71 +1,55 @@
-import sqlite3
-import aiosqlite
 from typing import List
 from datetime import datetime
+from database.database import Database
+from database.sharded_database import ShardedDatabase
 from models.split import Split
 from .split_repository import SplitRepository
 
 class SQLiteSplitRepository(SplitRepository):
-    def __init__(self, db_path: str = "expenses.db"):
-        self.db_path = db_path
-    
-    async def _init_db(self) -> None:
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS splits (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    debtor TEXT NOT NULL,
-                    creditor TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    month INTEGER NOT NULL,
-                    year INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            await conn.commit()
+    def __init__(self, database: Database | ShardedDatabase):
+        self.database = database
     
     async def save_splits(self, splits: List[Split]) -> None:
         if not splits:
             return
         
-        # Usar o primeiro split para determinar mês/ano
-        month, year = splits[0].month, splits[0].year
+        # Usar o primeiro split para determinar servidor/canal/mês/ano
+        first = splits[0]
+        guild_id, channel_id, month, year = first.guild_id, first.channel_id, first.month, first.year
         
-        async with aiosqlite.connect(self.db_path) as conn:
-            await self._init_db()
-            
-            # Remover splits existentes do mesmo mês/ano
+        async with self.database.for_guild(guild_id) as database, database.transaction() as conn:
+            # Remover splits existentes do mesmo servidor/canal/mês/ano
             await conn.execute(
-                'DELETE FROM splits WHERE month = ? AND year = ?',
-                (month, year)
+                'DELETE FROM splits WHERE guild_id = ? AND channel_id = ? AND year = ? AND month = ?',
+                (guild_id, channel_id, year, month)
             )
-            
-            # Inserir novos splits
-            for split in splits:
-                await conn.execute('''
-                    INSERT INTO splits (debtor, creditor, amount, month, year, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
+
+            # Inserir novos splits em lote
+            await conn.executemany('''
+                INSERT INTO splits (debtor, creditor, amount, month, year, guild_id, channel_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
                     split.debtor,
                     split.creditor,
                     split.amount,
                     split.month,
                     split.year,
+                    split.guild_id,
+                    split.channel_id,
                     split.created_at
-                ))
-            
-            await conn.commit()
+                )
+                for split in splits
+            ])
     
-    async def get_splits_by_month(self, month: int, year: int) -> List[Split]:
-        async with aiosqlite.connect(self.db_path) as conn:
-            await self._init_db()
-            
+    async def get_splits_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> List[Split]:
+        async with self.database.for_guild(guild_id) as database, database.acquire() as conn:
             cursor = await conn.execute('''
-                SELECT id, debtor, creditor, amount, month, year, created_at
+                SELECT id, debtor, creditor, amount, month, year, guild_id, channel_id, created_at
                 FROM splits
-                WHERE month = ? AND year = ?
+                WHERE guild_id = ? AND channel_id = ? AND year = ? AND month = ?
                 ORDER BY created_at
-            ''', (month, year))
+            ''', (guild_id, channel_id, year, month))
             
             rows = await cursor.fetchall()
             return [
@@ -76,16 +60,16 @@ class SQLiteSplitRepository(SplitRepository):
                     amount=row[3],
                     month=row[4],
                     year=row[5],
-                    created_at=datetime.fromisoformat(row[6]) if row[6] else None
+                    guild_id=row[6],
+                    channel_id=row[7],
+                    created_at=datetime.fromisoformat(row[8]) if row[8] else None
                 )
                 for row in rows
             ]
     
-    async def delete_splits_by_month(self, month: int, year: int) -> None:
-        async with aiosqlite.connect(self.db_path) as conn:
-            await self._init_db()
+    async def delete_splits_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> None:
+        async with self.database.for_guild(guild_id) as database, database.transaction() as conn:
             await conn.execute(
-                'DELETE FROM splits WHERE month = ? AND year = ?',
-                (month, year)
+                'DELETE FROM splits WHERE guild_id = ? AND channel_id = ? AND year = ? AND month = ?',
+                (guild_id, channel_id, year, month)
             )
-            await conn.commit()
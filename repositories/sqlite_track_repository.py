@@ -0,0 +1,58 @@
+from typing import List
+from datetime import datetime
+from database.database import Database
+from database.sharded_database import ShardedDatabase
+from models.played_track import PlayedTrack
+from .track_repository import TrackRepository
+
+class SQLiteTrackRepository(TrackRepository):
+    def __init__(self, database: Database | ShardedDatabase):
+        self.database = database
+    
+    async def record_plays(self, guild_id: int, tracks: List[PlayedTrack]) -> None:
+        if not tracks:
+            return
+        
+        async with self.database.for_guild(guild_id) as database, database.transaction() as conn:
+            await conn.executemany('''
+                INSERT INTO played_tracks (guild_id, video_id, title, url, play_count, last_played_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (guild_id, video_id) DO UPDATE SET
+                    title = excluded.title,
+                    url = excluded.url,
+                    play_count = play_count + excluded.play_count,
+                    last_played_at = excluded.last_played_at
+            ''', [
+                (
+                    guild_id,
+                    track.video_id,
+                    track.title,
+                    track.url,
+                    track.play_count,
+                    track.last_played_at
+                )
+                for track in tracks
+            ])
+    
+    async def get_tracks(self, guild_id: int, limit: int) -> List[PlayedTrack]:
+        async with self.database.for_guild(guild_id) as database, database.acquire() as conn:
+            cursor = await conn.execute('''
+                SELECT guild_id, video_id, title, url, play_count, last_played_at
+                FROM played_tracks
+                WHERE guild_id = ?
+                ORDER BY play_count DESC, last_played_at DESC
+                LIMIT ?
+            ''', (guild_id, limit))
+            
+            rows = await cursor.fetchall()
+            return [
+                PlayedTrack(
+                    guild_id=row[0],
+                    video_id=row[1],
+                    title=row[2],
+                    url=row[3],
+                    play_count=row[4],
+                    last_played_at=datetime.fromisoformat(row[5]) if row[5] else None
+                )
+                for row in rows
+            ]
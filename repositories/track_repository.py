@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from typing import List
+from models.played_track import PlayedTrack
+
+class TrackRepository(ABC):
+    @abstractmethod
+    async def record_plays(self, guild_id: int, tracks: List[PlayedTrack]) -> None:
+        """Registra músicas tocadas em um servidor, somando `play_count` às já registradas"""
+        pass
+    
+    @abstractmethod
+    async def get_tracks(self, guild_id: int, limit: int) -> List[PlayedTrack]:
+        """Busca as músicas mais tocadas de um servidor"""
+        pass
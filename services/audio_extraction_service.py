@@ -0,0 +1,197 @@
+import asyncio
+import re
+import threading
+import time
+import yt_dlp
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+from config import YTDL_MAX_WORKERS, YTDL_EXTRACT_TIMEOUT, TRACK_CACHE_MAX_ENTRIES, TRACK_CACHE_TTL, PLAYLIST_MAX_ENTRIES
+from models.audio_track import AudioTrack
+from services.cache import InFlight, TTLCache
+
+# Opções usadas para obter o link de áudio de um vídeo. Formatos Opus são
+# preferidos por serem enviados ao Discord sem recodificação.
+YTDL_OPTIONS = {
+    'format': 'bestaudio[acodec=opus][abr<=96]/bestaudio[abr<=96]/bestaudio',
+    'quiet': True,
+    'noplaylist': True,
+    'youtube_include_dash_manifest': False,
+    'youtube_include_hls_manifest': False,
+}
+
+# Extração "plana" de playlists: apenas título e link de cada vídeo, sem formatos
+YTDL_PLAYLIST_OPTIONS = {
+    'extract_flat': 'in_playlist',
+    'quiet': True,
+    'playlistend': PLAYLIST_MAX_ENTRIES,
+}
+
+# Títulos que o YouTube usa para vídeos indisponíveis em playlists
+_UNAVAILABLE_TITLES = {'[Private video]', '[Deleted video]'}
+
+# Id do vídeo nos formatos de link mais comuns do YouTube
+_YOUTUBE_ID_PATTERN = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:[^#]*&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w-]{11})'
+)
+
+# Margem para não entregar um link de stream prestes a expirar
+STREAM_EXPIRY_MARGIN = 60
+
+def track_cache_key(url: str) -> str:
+    """Chave do cache para um link: o id do vídeo, quando reconhecido, ou o próprio link"""
+    match = _YOUTUBE_ID_PATTERN.search(url)
+    return f"youtube:{match.group(1)}" if match else url
+
+def is_playlist_url(url: str) -> bool:
+    """Se o link é de uma playlist (e não de um vídeo aberto dentro de uma playlist)"""
+    parsed = urlparse(url)
+    if 'list' not in parse_qs(parsed.query):
+        return False
+    # Links com id de vídeo (watch?v=, youtu.be/, shorts/, live/) tocam só o vídeo
+    return parsed.path.rstrip('/') == '/playlist' or not _YOUTUBE_ID_PATTERN.search(url)
+
+def stream_expires_in(stream_url: str) -> float | None:
+    """Segundos até o link de stream expirar, pelo parâmetro `expire` do próprio link"""
+    expire = parse_qs(urlparse(stream_url).query).get('expire')
+    if not expire or not expire[0].isdigit():
+        return None
+    return int(expire[0]) - time.time() - STREAM_EXPIRY_MARGIN
+
+class AudioExtractionError(Exception):
+    """Falha ao extrair as informações de áudio de um link"""
+
+class AudioExtractionService:
+    """
+    Executa as extrações do yt-dlp em um pool limitado de threads.
+
+    `extract_info` é síncrono e pode levar segundos; rodá-lo no event loop
+    trava heartbeats, voz e os comandos de todos os servidores. Aqui no máximo
+    `max_workers` extrações rodam ao mesmo tempo, as demais aguardam sua vez
+    no event loop, e cada uma é limitada a `timeout` segundos de execução.
+    """
+
+    def __init__(self, max_workers: int, timeout: float, cache: TTLCache[str, AudioTrack] | None = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache = cache if cache is not None else TTLCache(max_entries=TRACK_CACHE_MAX_ENTRIES, ttl=TRACK_CACHE_TTL)
+        self._pending: InFlight[str, AudioTrack] = InFlight()
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(max_workers)
+        # Uma instância do YoutubeDL por thread, reaproveitada entre extrações
+        self._local = threading.local()
+
+    async def get_track(self, url: str) -> AudioTrack:
+        """
+        Título e link de stream de um vídeo, extraídos uma única vez.
+
+        As faixas ficam em cache pelo id do vídeo até o link de stream expirar,
+        compartilhadas por todos os servidores; pedidos simultâneos do mesmo
+        vídeo aguardam a mesma extração.
+
+        Args:
+            url: Link do vídeo
+
+        Returns:
+            Faixa com título e link de stream ainda válido
+
+        Raises:
+            AudioExtractionError: Se a extração falhar ou exceder o tempo limite
+        """
+        key = track_cache_key(url)
+        track = self.cache.get(key)
+        if track is not None:
+            return track
+
+        return await self._pending.run(key, lambda: self._resolve(url, key))
+
+    async def _resolve(self, url: str, key: str) -> AudioTrack:
+        track = AudioTrack.from_info(await self.extract(url))
+
+        expires_in = stream_expires_in(track.stream_url)
+        expires_at = self.cache.clock() + expires_in if expires_in is not None else None
+        if expires_in is None or expires_in > 0:
+            # Guardar também pelo id informado pelo extrator (links fora do padrão reconhecido)
+            self.cache.set(key, track, expires_at)
+            if track.video_id != key:
+                self.cache.set(track.video_id, track, expires_at)
+        return track
+
+    async def extract_playlist(self, url: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Lista os vídeos de uma playlist com uma extração leve, sem resolver os streams.
+
+        Args:
+            url: Link da playlist
+
+        Returns:
+            Tupla (título da playlist, lista de (título, link) dos vídeos disponíveis)
+
+        Raises:
+            AudioExtractionError: Se a extração falhar ou exceder o tempo limite
+        """
+        info = await self._run(self._extract_playlist_sync, url)
+        entries = []
+        for entry in info.get('entries') or []:
+            if not entry or entry.get('title') in _UNAVAILABLE_TITLES:
+                continue
+            entry_url = entry.get('url') or entry.get('webpage_url')
+            if entry_url:
+                entries.append((entry.get('title') or entry_url, entry_url))
+        return info.get('title') or url, entries
+
+    async def extract(self, url: str) -> Dict[str, Any]:
+        """
+        Extrai as informações de um link sem baixar o conteúdo.
+
+        Se a task for cancelada enquanto aguarda, a extração nem chega a
+        ocupar uma thread; uma extração já iniciada não pode ser interrompida
+        e, se estourar o tempo limite ou for cancelada, tem o resultado ignorado.
+
+        Args:
+            url: Link do vídeo
+
+        Returns:
+            Dicionário de informações do yt-dlp (inclui 'url' e 'title')
+
+        Raises:
+            AudioExtractionError: Se a extração falhar ou exceder o tempo limite
+        """
+        return await self._run(self._extract_sync, url)
+
+    async def _run(self, extract_sync: Callable[[str], Dict[str, Any]], url: str) -> Dict[str, Any]:
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), extract_sync, url)
+            try:
+                return await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                raise AudioExtractionError(f"Tempo esgotado ao extrair {url}") from None
+            except yt_dlp.utils.DownloadError as e:
+                raise AudioExtractionError(str(e)) from e
+
+    def shutdown(self) -> None:
+        """Descarta as extrações pendentes e libera as threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="yt-dlp")
+        return self._executor
+
+    def _extract_sync(self, url: str) -> Dict[str, Any]:
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = self._local.ydl = yt_dlp.YoutubeDL(YTDL_OPTIONS)
+        return ydl.extract_info(url, download=False)
+
+    def _extract_playlist_sync(self, url: str) -> Dict[str, Any]:
+        ydl = getattr(self._local, 'playlist_ydl', None)
+        if ydl is None:
+            ydl = self._local.playlist_ydl = yt_dlp.YoutubeDL(YTDL_PLAYLIST_OPTIONS)
+        return ydl.extract_info(url, download=False)
+
+# Pool compartilhado por todos os servidores
+audio_extraction_service = AudioExtractionService(YTDL_MAX_WORKERS, YTDL_EXTRACT_TIMEOUT)
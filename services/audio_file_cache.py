@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Optional
+from config import AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, AUDIO_CACHE_MAX_DURATION
+from models.audio_track import AudioTrack
+
+# Gravações simultâneas de arquivos para o cache
+MAX_CONCURRENT_SAVES = 2
+
+class AudioFileCache:
+    """
+    Cache em disco das músicas tocadas, já em Opus, indexado pelo id do vídeo.
+
+    Na primeira vez que uma faixa toca, uma cópia é gravada em segundo plano
+    por um processo ffmpeg; nas próximas vezes ela é tocada direto do disco,
+    sem yt-dlp nem download. Quando o total passa de `max_bytes`, os arquivos
+    acessados há mais tempo são apagados primeiro. Sem `directory`, o cache
+    fica desativado.
+    """
+
+    def __init__(self, directory: Optional[str], max_bytes: int, max_duration: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.total_bytes = 0
+        # nome do arquivo -> tamanho, do acessado há mais tempo para o mais recente
+        self._files: OrderedDict[str, int] | None = None
+        self._saving: Dict[str, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_SAVES)
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Caminho do arquivo da faixa, se estiver no cache.
+
+        Args:
+            key: Id do vídeo (ver `track_cache_key`)
+
+        Returns:
+            Caminho do arquivo .opus ou None
+        """
+        if not self.enabled:
+            return None
+
+        files = self._index()
+        name = self._file_name(key)
+        if name not in files:
+            return None
+
+        path = os.path.join(self.directory, name)
+        try:
+            # Registrar o acesso no próprio arquivo, para a ordem sobreviver a reinícios
+            os.utime(path)
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+
+        files.move_to_end(name)
+        return path
+
+    def store(self, key: str, track: AudioTrack) -> None:
+        """Grava a faixa no cache em segundo plano, se ainda não estiver lá"""
+        if not self.enabled or self.max_bytes <= 0:
+            return
+        if track.duration is None or track.duration > self.max_duration:
+            # Transmissões ao vivo e faixas longas demais não são guardadas
+            return
+
+        name = self._file_name(key)
+        if name in self._index() or name in self._saving:
+            return
+
+        task = asyncio.create_task(self._save(name, track))
+        self._saving[name] = task
+        task.add_done_callback(lambda _: self._saving.pop(name, None))
+
+    async def close(self) -> None:
+        """Interrompe as gravações em andamento"""
+        tasks = list(self._saving.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _save(self, name: str, track: AudioTrack) -> None:
+        async with self._semaphore:
+            path = os.path.join(self.directory, name)
+            partial = path + '.part'
+            codec = 'copy' if track.acodec == 'opus' else 'libopus'
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    'ffmpeg', '-nostdin', '-loglevel', 'error', '-y',
+                    '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
+                    '-i', track.stream_url,
+                    '-vn', '-map_metadata', '-1', '-c:a', codec, '-b:a', '96k', '-f', 'opus', partial,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+            except OSError as e:
+                print(f"Erro ao iniciar o ffmpeg para o cache de áudio: {e}")
+                return
+            try:
+                returncode = await process.wait()
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                self._remove(partial)
+                raise
+
+            if returncode != 0:
+                print(f"Erro ao gravar {track.title} no cache de áudio (ffmpeg saiu com {returncode})")
+                self._remove(partial)
+                return
+
+            os.replace(partial, path)
+            files = self._index()
+            size = os.path.getsize(path)
+            files[name] = size
+            self.total_bytes += size
+            self._evict()
+
+    def _index(self) -> OrderedDict[str, int]:
+        # Os arquivos já gravados são lidos do diretório no primeiro uso
+        if self._files is None:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.part'):
+                        # Sobra de uma gravação interrompida
+                        self._remove(entry.path)
+                    elif entry.name.endswith('.opus') and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+            self._files = OrderedDict((name, size) for _, name, size in sorted(entries))
+            self.total_bytes = sum(self._files.values())
+            self._evict()
+        return self._files
+
+    def _evict(self) -> None:
+        files = self._files
+        while files and self.total_bytes > self.max_bytes:
+            name = next(iter(files))
+            self._forget(name)
+            self._remove(os.path.join(self.directory, name))
+
+    def _forget(self, name: str) -> None:
+        size = self._files.pop(name, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        name = re.sub(r'[^\w-]', '_', key)
+        if len(name) > 100:
+            # Links fora do padrão reconhecido podem ser longos demais para um nome de arquivo
+            name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return name + '.opus'
+
+# Cache compartilhado por todos os servidores (desativado sem AUDIO_CACHE_DIR)
+audio_file_cache = AudioFileCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, AUDIO_CACHE_MAX_DURATION)
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+class TTLCache(Generic[K, V]):
+    """
+    Cache LRU com expiração por tempo.
+
+    As entradas expiram após `ttl` segundos (ou no prazo informado em `set`) e,
+    quando `max_entries` ou `max_weight` são excedidos, as usadas há mais tempo
+    são removidas primeiro. O peso de cada entrada é dado por `weigher`.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_weight: Optional[int] = None,
+        ttl: Optional[float] = None,
+        weigher: Callable[[V], int] = lambda _: 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.ttl = ttl
+        self.weigher = weigher
+        self.clock = clock
+        self.weight = 0
+        # chave -> (valor, expira_em, peso)
+        self._entries: OrderedDict[K, Tuple[V, Optional[float], int]] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        """Retorna o valor da chave (marcando-o como usado) ou None se ausente/expirado"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at is not None and expires_at <= self.clock():
+            self.pop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, expires_at: Optional[float] = None) -> None:
+        """
+        Armazena um valor, removendo entradas antigas se os limites forem excedidos.
+
+        Args:
+            key: Chave
+            value: Valor
+            expires_at: Instante de expiração no relógio do cache; por padrão, agora + ttl
+        """
+        if expires_at is None and self.ttl is not None:
+            expires_at = self.clock() + self.ttl
+
+        weight = self.weigher(value)
+        if self.max_weight is not None and weight > self.max_weight:
+            # Maior que o cache inteiro: não vale a pena guardar
+            self.pop(key)
+            return
+
+        self.pop(key)
+        self._entries[key] = (value, expires_at, weight)
+        self.weight += weight
+        self._evict()
+
+    def pop(self, key: K) -> Optional[V]:
+        """Remove a chave e retorna o valor, se existir"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+
+        self.weight -= entry[2]
+        return entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _over_limit(self) -> bool:
+        return (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_weight is not None and self.weight > self.max_weight)
+        )
+
+    def _evict(self) -> None:
+        if not self._over_limit():
+            return
+
+        # Primeiro as entradas já expiradas, depois as usadas há mais tempo
+        now = self.clock()
+        for key in [key for key, (_, expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]:
+            self.pop(key)
+
+        while self._over_limit():
+            self.pop(next(iter(self._entries)))
+
+class InFlight(Generic[K, V]):
+    """
+    Execuções em andamento por chave: chamadas simultâneas com a mesma chave
+    aguardam a mesma execução em vez de repeti-la.
+
+    A execução roda em uma task própria e cada interessado a aguarda com
+    `asyncio.shield`, então um interessado cancelado não cancela os demais. A
+    chave é liberada quando a execução termina, com sucesso ou erro; guardar o
+    resultado (em um `TTLCache`, por exemplo) fica a cargo da própria execução.
+    """
+
+    def __init__(self):
+        self._futures: Dict[K, asyncio.Future[V]] = {}
+
+    async def run(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        """
+        Aguarda a execução em andamento da chave ou inicia uma com `factory`.
+
+        Args:
+            key: Chave da execução
+            factory: Cria a corrotina executada quando não há outra em andamento
+
+        Returns:
+            Resultado da execução
+        """
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._futures[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(future)
+
+    def futures(self) -> List[asyncio.Future[V]]:
+        """Execuções em andamento"""
+        return list(self._futures.values())
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def _finished(self, key: K, future: asyncio.Future[V]) -> None:
+        if self._futures.get(key) is future:
+            del self._futures[key]
+        # Evitar o aviso de exceção não lida quando todos os interessados desistiram
+        if not future.cancelled():
+            future.exception()
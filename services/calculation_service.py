@@ -1,5 +1,7 @@
+import heapq
 from typing import List, Tuple, Dict
 from dataclasses import dataclass
+from models.expense_batch import ExpenseBatch
 
 @dataclass
 class ExpenseCalculation:
@@ -17,17 +19,20 @@ class CalculationService:
     """Serviço para cálculos de despesas e divisão de contas"""
     
     @staticmethod
-    def calculate_expenses(expenses_data: List[Tuple[float, str, str]]) -> ExpenseCalculation:
+    def calculate_expenses(expenses: ExpenseBatch) -> ExpenseCalculation:
         """
         Calcula totais, médias e divisão de despesas.
         
+        Os valores são somados em centavos inteiros, então os saldos sempre
+        somam exatamente zero e não surgem pagamentos de centavos fantasmas.
+        
         Args:
-            expenses_data: Lista de tuplas (valor, descrição, quem_pagou)
+            expenses: Lote de despesas
             
         Returns:
             ExpenseCalculation: Resultado completo dos cálculos
         """
-        if not expenses_data:
+        if not expenses:
             return ExpenseCalculation(
                 total_by_person={},
                 total_sum=0,
@@ -39,45 +44,73 @@ class CalculationService:
                 payments=[]
             )
         
-        # Calcular total por pessoa
-        total_by_person = {}
-        for value, _, person in expenses_data:
-            total_by_person[person] = total_by_person.get(person, 0) + value
+        # Calcular total por pessoa em centavos
+        cents_by_person = expenses.totals_by_person_cents()
         
-        people = list(total_by_person.keys())
-        total_sum = sum(total_by_person.values())
-        average = total_sum / len(people)
+        people = list(cents_by_person.keys())
+        total_cents = sum(cents_by_person.values())
         
-        # Calcular balanço por pessoa
-        balance_by_person = {person: total_by_person[person] - average for person in people}
+        # Calcular balanço por pessoa: a cota é a média em centavos e os centavos
+        # que sobram da divisão ficam com as primeiras pessoas em ordem alfabética
+        share, remainder = divmod(total_cents, len(people))
+        balance_cents = {
+            person: cents_by_person[person] - share - (1 if index < remainder else 0)
+            for index, person in enumerate(sorted(people))
+        }
         
-        # Separar devedores e credores
-        debtors = [(person, -balance) for person, balance in balance_by_person.items() if balance < 0]
-        creditors = [(person, balance) for person, balance in balance_by_person.items() if balance > 0]
+        payments = CalculationService.settle_balances(balance_cents)
         
-        # Calcular pagamentos
-        payments = []
-        for debtor_name, amount_owed in debtors:
-            for i, (creditor_name, amount_to_receive) in enumerate(creditors):
-                if amount_owed == 0:
-                    break
-                payment_amount = min(amount_owed, amount_to_receive)
-                if payment_amount > 0:
-                    payments.append((debtor_name, creditor_name, payment_amount))
-                    creditors[i] = (creditor_name, amount_to_receive - payment_amount)
-                    amount_owed -= payment_amount
+        # Separar devedores e credores
+        debtors = [(person, -cents / 100) for person, cents in balance_cents.items() if cents < 0]
+        creditors = [(person, cents / 100) for person, cents in balance_cents.items() if cents > 0]
         
         return ExpenseCalculation(
-            total_by_person=total_by_person,
-            total_sum=total_sum,
+            total_by_person={person: cents / 100 for person, cents in cents_by_person.items()},
+            total_sum=total_cents / 100,
             people_count=len(people),
-            average=average,
-            balance_by_person=balance_by_person,
+            average=total_cents / len(people) / 100,
+            balance_by_person={person: balance_cents[person] / 100 for person in people},
             debtors=debtors,
             creditors=creditors,
-            payments=payments
+            payments=[(debtor, creditor, cents / 100) for debtor, creditor, cents in payments]
         )
     
+    @staticmethod
+    def settle_balances(balance_cents: Dict[str, int]) -> List[Tuple[str, str, int]]:
+        """
+        Gera os pagamentos que quitam os saldos, em O(n log n).
+        
+        A cada passo o maior devedor paga ao maior credor o menor dos dois
+        saldos, zerando ao menos um deles; assim são feitas no máximo n - 1
+        transferências, em geral bem menos que no pareamento em ordem.
+        
+        Args:
+            balance_cents: Saldo de cada pessoa em centavos (positivo recebe, negativo deve);
+                a soma dos saldos deve ser zero
+            
+        Returns:
+            Lista de tuplas (devedor, credor, valor_em_centavos)
+        """
+        # heapq é um heap mínimo: os saldos entram negativos para sair do maior para o menor
+        debtors = [(cents, person) for person, cents in balance_cents.items() if cents < 0]
+        creditors = [(-cents, person) for person, cents in balance_cents.items() if cents > 0]
+        heapq.heapify(debtors)
+        heapq.heapify(creditors)
+        
+        payments = []
+        while debtors and creditors:
+            owed, debtor = heapq.heappop(debtors)
+            to_receive, creditor = heapq.heappop(creditors)
+            amount = min(-owed, -to_receive)
+            payments.append((debtor, creditor, amount))
+            
+            if owed + amount < 0:
+                heapq.heappush(debtors, (owed + amount, debtor))
+            if to_receive + amount < 0:
+                heapq.heappush(creditors, (to_receive + amount, creditor))
+        
+        return payments
+    
     @staticmethod
     def format_summary_text(calculation: ExpenseCalculation, month: int, year: int, title: str) -> str:
         """
@@ -1,27 +1,76 @@
+import asyncio
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
-from typing import Dict, List
-import tempfile
-import os
+from io import BytesIO
+from typing import Callable, Hashable
+from config import EXCEL_CACHE_MAX_BYTES, EXCEL_CACHE_TTL
+from models.expense_batch import ExpenseBatch
+from services.cache import InFlight, TTLCache
+
+# Relatórios já gerados, compartilhados por todas as instâncias do serviço e
+# indexados pelo hash do conteúdo: dados iguais geram o mesmo arquivo
+report_cache: TTLCache[Hashable, bytes] = TTLCache(
+    max_weight=EXCEL_CACHE_MAX_BYTES,
+    ttl=EXCEL_CACHE_TTL,
+    weigher=len
+)
+_pending_reports: InFlight[Hashable, bytes] = InFlight()
 
 class ExcelService:
-    def __init__(self):
-        pass
+    def __init__(self, cache: TTLCache[Hashable, bytes] = report_cache):
+        self.cache = cache
+        self._pending = _pending_reports
+    
+    async def generate_expenses_excel_async(self, expenses: ExpenseBatch) -> bytes:
+        """
+        Gera o arquivo Excel em uma thread de trabalho, sem bloquear o event loop.
+        
+        Exportações repetidas dos mesmos dados são servidas do cache.
+        
+        Args:
+            expenses: Lote de despesas
+            
+        Returns:
+            Conteúdo do arquivo .xlsx
+        """
+        key = ("gastos", expenses.content_hash())
+        return await self._cached(key, lambda: self.generate_expenses_excel(expenses))
+    
+    async def _cached(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+        
+        async def generate() -> bytes:
+            content = await asyncio.to_thread(build)
+            self.cache.set(key, content)
+            return content
+        
+        # Cliques simultâneos nos mesmos dados aguardam a mesma geração
+        return await self._pending.run(key, generate)
     
-    def generate_expenses_excel(self, expenses_by_person: Dict[str, List[str]]) -> str:
+    def generate_expenses_excel(self, expenses: ExpenseBatch) -> bytes:
         """
         Gera um arquivo Excel com as despesas organizadas por pessoa.
         
+        Usa o modo write-only do openpyxl, que grava as linhas em streaming
+        em vez de manter a planilha inteira em memória, direto em um buffer.
+        
         Args:
-            expenses_by_person: Dicionário com pessoa como chave e lista de despesas como valor
+            expenses: Lote de despesas
             
         Returns:
-            Caminho do arquivo Excel gerado
+            Conteúdo do arquivo .xlsx
         """
         # Criar workbook e worksheet
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Gastos"
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Gastos")
+        
+        # Ajustar largura das colunas (antes de gravar as linhas)
+        ws.column_dimensions['A'].width = 15
+        ws.column_dimensions['B'].width = 12
+        ws.column_dimensions['C'].width = 40
         
         # Estilos
         header_font = Font(bold=True, color="FFFFFF")
@@ -29,42 +78,21 @@ class ExcelService:
         center_alignment = Alignment(horizontal="center", vertical="center")
         
         # Cabeçalho
-        ws['A1'] = "Pessoa"
-        ws['B1'] = "Valor"
-        ws['C1'] = "Descrição"
-        
-        # Aplicar estilos ao cabeçalho
-        for cell in ['A1', 'B1', 'C1']:
-            ws[cell].font = header_font
-            ws[cell].fill = header_fill
-            ws[cell].alignment = center_alignment
+        header = []
+        for title in ("Pessoa", "Valor", "Descrição"):
+            cell = WriteOnlyCell(ws, value=title)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = center_alignment
+            header.append(cell)
+        ws.append(header)
         
         # Dados
-        row = 2
-        for person in sorted(expenses_by_person.keys()):
-            for expense_line in expenses_by_person[person]:
-                # Parse da linha: "- valor;descrição;pessoa"
-                parts = expense_line[2:].split(';')  # Remove "- " e divide por ";"
-                if len(parts) >= 3:
-                    value = parts[0]
-                    description = parts[1]
-                    
-                    ws[f'A{row}'] = person
-                    ws[f'B{row}'] = float(value.replace(',', '.'))
-                    ws[f'C{row}'] = description
-                    row += 1
-        
-        # Ajustar largura das colunas
-        ws.column_dimensions['A'].width = 15
-        ws.column_dimensions['B'].width = 12
-        ws.column_dimensions['C'].width = 40
-        
-        # Criar arquivo temporário
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-        temp_path = temp_file.name
-        temp_file.close()
-        
-        # Salvar arquivo
-        wb.save(temp_path)
+        indices_by_person = expenses.indices_by_person()
+        for person in sorted(indices_by_person.keys()):
+            for index in indices_by_person[person]:
+                ws.append([person, expenses.cents[index] / 100, expenses.description(index)])
         
-        return temp_path
+        buffer = BytesIO()
+        wb.save(buffer)
+        return buffer.getvalue()
@@ -0,0 +1,68 @@
+from typing import List, Tuple
+from models.expense_batch import MAX_VALUE
+
+def parse_expense_line(line: str) -> Tuple[float, str, str] | None:
+    """
+    Parse uma linha de despesa no formato: - Valor;Descrição;Pessoa
+
+    Args:
+        line: Linha de texto a ser parseada
+
+    Returns:
+        Tupla (valor, descrição, pessoa) ou None se inválida
+    """
+    valid_expenses, _ = analyze_message_content(line.split('\n', 1)[0])
+    return valid_expenses[0] if valid_expenses else None
+
+def extract_expenses_from_message(message_content: str) -> List[Tuple[float, str, str]]:
+    """
+    Extrai despesas de uma mensagem, suportando tanto formato individual quanto múltiplas linhas.
+
+    Args:
+        message_content: Conteúdo da mensagem
+
+    Returns:
+        Lista de tuplas (valor, descrição, pessoa)
+    """
+    valid_expenses, _ = analyze_message_content(message_content)
+    return valid_expenses
+
+def analyze_message_content(message_content: str) -> Tuple[List[Tuple[float, str, str]], List[str]]:
+    """
+    Analisa o conteúdo de uma mensagem e retorna despesas válidas e linhas inválidas.
+
+    Args:
+        message_content: Conteúdo da mensagem
+
+    Returns:
+        Tupla (despesas_válidas, linhas_inválidas)
+    """
+    valid_expenses = []
+    invalid_lines = []
+
+    # Cada linha passa por um único strip; valor, descrição e pessoa saem de um split
+    for line in message_content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        if line[0] == '-':
+            parts = line[1:].split(';')
+            if len(parts) == 3:
+                value_str, description, person = parts
+                try:
+                    # float() já ignora os espaços em volta do valor
+                    value = float(value_str.replace(',', '.'))
+                except ValueError:
+                    pass
+                else:
+                    # Uma única comparação recusa "nan", "inf" e valores grandes demais para centavos em 64 bits
+                    if -MAX_VALUE <= value <= MAX_VALUE:
+                        valid_expenses.append((value, description.strip(), person.strip()))
+                        continue
+            # Tentativa de despesa fora do padrão
+            invalid_lines.append(line)
+        elif ';' in line:
+            invalid_lines.append(line)
+
+    return valid_expenses, invalid_lines
@@ -1,22 +1,39 @@
 from typing import List, Dict, Tuple
 from datetime import datetime
+from database.database import Database
+from database.migrations import LEGACY_SCOPE
+from database.sharded_database import ShardedDatabase
 from models.expense import Expense
+from models.expense_batch import ExpenseBatch
 from models.split import Split
 from repositories.expense_repository import ExpenseRepository
 from repositories.split_repository import SplitRepository
 from services.calculation_service import CalculationService
 
 class ExpenseService:
-    def __init__(self, expense_repository: ExpenseRepository, split_repository: SplitRepository):
+    def __init__(self, expense_repository: ExpenseRepository, split_repository: SplitRepository, database: Database | ShardedDatabase):
         self.expense_repository = expense_repository
         self.split_repository = split_repository
+        self.database = database
     
-    async def save_monthly_data(self, expenses_data: List[Tuple[float, str, str]], month: int, year: int) -> None:
+    async def save_monthly_data(
+        self,
+        expenses_data: ExpenseBatch,
+        guild_id: int,
+        channel_id: int,
+        month: int,
+        year: int
+    ) -> None:
         """
         Salva dados mensais de despesas e calcula/armazena os splits correspondentes.
         
+        Despesas e splits são gravados em uma única transação: ou o mês inteiro
+        é substituído, ou nada muda.
+        
         Args:
-            expenses_data: Lista de tuplas (valor, descrição, quem_pagou)
+            expenses_data: Lote de despesas (valor, descrição, quem_pagou)
+            guild_id: Servidor de onde vieram as despesas
+            channel_id: Canal de onde vieram as despesas
             month: Mês (1-12)
             year: Ano
         """
@@ -28,19 +45,33 @@ class ExpenseService:
                 description=description,
                 paid_by=paid_by,
                 month=month,
-                year=year
+                year=year,
+                guild_id=guild_id,
+                channel_id=channel_id
             )
             for value, description, paid_by in expenses_data
         ]
         
-        # Salvar despesas
-        await self.expense_repository.save_expenses(expenses)
+        # Calcular splits usando o CalculationService
+        splits = self._calculate_splits(expenses_data, guild_id, channel_id, month, year)
         
-        # Calcular e salvar splits usando o CalculationService
-        splits = self._calculate_splits(expenses_data, month, year)
-        await self.split_repository.save_splits(splits)
+        async with self.database.for_guild(guild_id) as database, database.transaction():
+            await self.expense_repository.save_expenses(expenses)
+            
+            if splits:
+                await self.split_repository.save_splits(splits)
+            else:
+                # Todos quitados: remover splits antigos do mesmo servidor/canal/mês/ano
+                await self.split_repository.delete_splits_by_month(guild_id, channel_id, month, year)
     
-    def _calculate_splits(self, expenses_data: List[Tuple[float, str, str]], month: int, year: int) -> List[Split]:
+    def _calculate_splits(
+        self,
+        expenses_data: ExpenseBatch,
+        guild_id: int,
+        channel_id: int,
+        month: int,
+        year: int
+    ) -> List[Split]:
         """
         Calcula quem deve para quem baseado nas despesas usando o CalculationService.
         """
@@ -56,17 +87,19 @@ class ExpenseService:
                 creditor=creditor,
                 amount=amount,
                 month=month,
-                year=year
+                year=year,
+                guild_id=guild_id,
+                channel_id=channel_id
             ))
         
         return splits
     
-    async def get_monthly_summary(self, month: int, year: int) -> Dict:
+    async def get_monthly_summary(self, guild_id: int, channel_id: int, month: int, year: int) -> Dict:
         """
-        Retorna resumo mensal com despesas e splits.
+        Retorna resumo mensal com despesas e splits de um servidor/canal.
         """
-        expenses = await self.expense_repository.get_expenses_by_month(month, year)
-        splits = await self.split_repository.get_splits_by_month(month, year)
+        guild_id, channel_id, expenses = await self._get_month_expenses(guild_id, channel_id, month, year)
+        splits = await self.split_repository.get_splits_by_month(guild_id, channel_id, month, year)
         
         return {
             'expenses': expenses,
@@ -75,10 +108,32 @@ class ExpenseService:
             'year': year
         }
     
-    async def get_expenses_by_month(self, month: int, year: int) -> List[Expense]:
-        """Retorna despesas de um mês específico."""
-        return await self.expense_repository.get_expenses_by_month(month, year)
+    async def get_expenses_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> List[Expense]:
+        """Retorna despesas de um servidor/canal em um mês específico."""
+        _, _, expenses = await self._get_month_expenses(guild_id, channel_id, month, year)
+        return expenses
+    
+    async def get_splits_by_month(self, guild_id: int, channel_id: int, month: int, year: int) -> List[Split]:
+        """Retorna splits de um servidor/canal em um mês específico."""
+        guild_id, channel_id, _ = await self._get_month_expenses(guild_id, channel_id, month, year)
+        return await self.split_repository.get_splits_by_month(guild_id, channel_id, month, year)
     
-    async def get_splits_by_month(self, month: int, year: int) -> List[Split]:
-        """Retorna splits de um mês específico."""
-        return await self.split_repository.get_splits_by_month(month, year)
+    async def _get_month_expenses(self, guild_id: int, channel_id: int, month: int, year: int) -> Tuple[int, int, List[Expense]]:
+        """
+        Despesas do mês no servidor/canal e o escopo de onde vieram.
+        
+        Meses salvos antes da separação por servidor/canal ficaram em
+        `LEGACY_SCOPE`; se o canal não salvou o mês, esses registros são usados.
+        Os splits devem ser lidos do mesmo escopo, para não misturar meses
+        salvos em escopos diferentes.
+        """
+        expenses = await self.expense_repository.get_expenses_by_month(guild_id, channel_id, month, year)
+        # Bancos por servidor são criados já com a separação: não há registros antigos neles
+        if expenses or (guild_id, channel_id) == LEGACY_SCOPE or isinstance(self.database, ShardedDatabase):
+            return guild_id, channel_id, expenses
+        
+        legacy_guild_id, legacy_channel_id = LEGACY_SCOPE
+        expenses = await self.expense_repository.get_expenses_by_month(legacy_guild_id, legacy_channel_id, month, year)
+        if not expenses:
+            return guild_id, channel_id, expenses
+        return legacy_guild_id, legacy_channel_id, expenses
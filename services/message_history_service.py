@@ -0,0 +1,198 @@
+import asyncio
+import discord
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Set, Tuple
+from config import MAX_HISTORY_CHANNELS, MAX_MESSAGE_HISTORY
+from services.cache import TTLCache
+from services.expense_parser import analyze_message_content
+
+@dataclass
+class ParsedMessage:
+    """Despesas e linhas inválidas extraídas de uma mensagem do canal"""
+    message_id: int
+    author: str
+    created_at: datetime
+    expenses: List[Tuple[float, str, str]]
+    invalid_lines: List[str]
+
+@dataclass
+class ChannelHistory:
+    """Ledger das mensagens já analisadas de um canal, da mais antiga para a mais recente"""
+    messages: Dict[int, ParsedMessage] = field(default_factory=dict)
+    live: bool = False
+    # Se o ledger tem todo o histórico do canal (não há mensagens mais antigas a buscar)
+    complete: bool = False
+    # Leitura do histórico em andamento: edições e exclusões recebidas nesse meio
+    # tempo são guardadas e reaplicadas ao final, para não serem sobrescritas
+    loading: bool = False
+    edits_during_load: Dict[int, str] = field(default_factory=dict)
+    deletes_during_load: Set[int] = field(default_factory=set)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+class MessageHistoryService:
+    """
+    Mantém um ledger por canal com o resultado já analisado das mensagens.
+
+    O ledger é preenchido a partir do histórico no primeiro uso e depois
+    atualizado pelos eventos do gateway (mensagens novas, editadas e apagadas),
+    de modo que os comandos respondem sem chamadas REST. Se os eventos deixarem
+    de ser confiáveis (reconexão sem resume), os ledgers são descartados: edições
+    e exclusões de mensagens antigas feitas nesse intervalo só aparecem relendo
+    o histórico inteiro. Mensagens apagadas são repostas pelas anteriores a
+    elas, buscadas na próxima consulta, para que o ledger continue com as
+    últimas `history_limit` mensagens. Apenas os `max_channels` canais usados
+    mais recentemente ficam em memória.
+    """
+
+    def __init__(self, history_limit: int, max_channels: int):
+        self.history_limit = history_limit
+        self._channels: TTLCache[int, ChannelHistory] = TTLCache(max_entries=max_channels)
+
+    async def get_messages(self, channel: discord.abc.Messageable) -> List[ParsedMessage]:
+        """
+        Retorna as últimas `history_limit` mensagens analisadas do canal.
+
+        Canais acompanhados por eventos são respondidos direto do ledger. Caso
+        contrário, o histórico é percorrido como antes.
+
+        Args:
+            channel: Canal de onde as mensagens serão lidas
+
+        Returns:
+            Lista de mensagens analisadas, da mais recente para a mais antiga
+        """
+        history = self._channels.get(channel.id)
+        if history is None:
+            history = ChannelHistory()
+            self._channels.set(channel.id, history)
+
+        async with history.lock:
+            if not history.live:
+                # Eventos recebidos durante a leitura já são aplicados ao ledger
+                history.live = True
+                try:
+                    await self._load(channel, history, self._load_full)
+                except BaseException:
+                    history.live = False
+                    raise
+            elif not history.complete and len(history.messages) < self.history_limit:
+                # Mensagens apagadas deixaram o ledger menor que o histórico original
+                await self._load(channel, history, self._load_older)
+
+            return list(reversed(history.messages.values()))
+
+    def invalidate(self, channel_id: int) -> None:
+        """Descarta o ledger de um canal, forçando nova leitura completa"""
+        self._channels.pop(channel_id)
+
+    def mark_stale(self) -> None:
+        """Descarta todos os ledgers (eventos podem ter sido perdidos), forçando nova leitura completa"""
+        self._channels.clear()
+
+    def apply_message(self, message: discord.Message) -> None:
+        """Adiciona uma mensagem nova ao ledger do canal, se ele estiver sendo acompanhado"""
+        history = self._channels.get(message.channel.id)
+        if history is None or not history.live:
+            return
+
+        self._store(history, message)
+        self._trim(history)
+
+    def apply_edit(self, channel_id: int, message_id: int, content: str) -> None:
+        """Reanalisa o conteúdo de uma mensagem editada que já está no ledger"""
+        history = self._channels.get(channel_id)
+        if history is None:
+            return
+        if history.loading:
+            history.edits_during_load[message_id] = content
+        if message_id not in history.messages:
+            return
+
+        valid_expenses, invalid_lines = analyze_message_content(content)
+        message = history.messages[message_id]
+        message.expenses = valid_expenses
+        message.invalid_lines = invalid_lines
+
+    def apply_delete(self, channel_id: int, message_ids: Iterable[int]) -> None:
+        """Retira do ledger as despesas de mensagens apagadas"""
+        history = self._channels.get(channel_id)
+        if history is None:
+            return
+
+        for message_id in message_ids:
+            history.messages.pop(message_id, None)
+            if history.loading:
+                history.deletes_during_load.add(message_id)
+
+    async def _load(
+        self,
+        channel: discord.abc.Messageable,
+        history: ChannelHistory,
+        load: Callable[[discord.abc.Messageable, ChannelHistory], Awaitable[None]]
+    ) -> None:
+        # Executa `load` e reaplica as edições e exclusões recebidas durante a leitura
+        history.loading = True
+        try:
+            await load(channel, history)
+            for message_id in history.deletes_during_load:
+                history.messages.pop(message_id, None)
+            for message_id, content in history.edits_during_load.items():
+                message = history.messages.get(message_id)
+                if message is not None:
+                    message.expenses, message.invalid_lines = analyze_message_content(content)
+        finally:
+            history.loading = False
+            history.edits_during_load.clear()
+            history.deletes_during_load.clear()
+
+    async def _load_full(self, channel: discord.abc.Messageable, history: ChannelHistory) -> None:
+        messages = [message async for message in channel.history(limit=self.history_limit)]
+        newest_id = messages[0].id if messages else 0
+
+        # Mensagens que chegaram por eventos durante a leitura são preservadas
+        received = [message for message_id, message in history.messages.items() if message_id > newest_id]
+
+        history.messages = {}
+        for message in reversed(messages):
+            self._store(history, message)
+        for message in received:
+            history.messages[message.message_id] = message
+        history.complete = len(messages) < self.history_limit
+        self._trim(history)
+
+    async def _load_older(self, channel: discord.abc.Messageable, history: ChannelHistory) -> None:
+        if not history.messages:
+            await self._load_full(channel, history)
+            return
+
+        missing = self.history_limit - len(history.messages)
+        oldest = discord.Object(id=next(iter(history.messages)))
+        messages = [message async for message in channel.history(limit=missing, before=oldest)]
+
+        # As mensagens mais antigas vão para o início do ledger
+        newer, history.messages = history.messages, {}
+        for message in reversed(messages):
+            self._store(history, message)
+        history.messages.update(newer)
+        history.complete = len(messages) < missing
+        self._trim(history)
+
+    def _trim(self, history: ChannelHistory) -> None:
+        # Manter apenas as últimas `history_limit` mensagens, como no histórico original
+        while len(history.messages) > self.history_limit:
+            del history.messages[next(iter(history.messages))]
+            history.complete = False
+
+    def _store(self, history: ChannelHistory, message: discord.Message) -> None:
+        valid_expenses, invalid_lines = analyze_message_content(message.content)
+        history.messages[message.id] = ParsedMessage(
+            message_id=message.id,
+            author=message.author.display_name,
+            created_at=message.created_at,
+            expenses=valid_expenses,
+            invalid_lines=invalid_lines
+        )
+
+# Instância compartilhada pelos comandos que leem o histórico do canal
+message_history_service = MessageHistoryService(MAX_MESSAGE_HISTORY, MAX_HISTORY_CHANNELS)
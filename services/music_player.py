@@ -0,0 +1,429 @@
+import asyncio
+import time
+import discord
+from collections import deque
+from itertools import islice
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from config import MUSIC_HISTORY_SIZE, MUSIC_IDLE_TIMEOUT, QUEUE_RESOLVE_AHEAD
+from models.audio_track import AudioTrack
+from services.audio_extraction_service import AudioExtractionError, audio_extraction_service, track_cache_key
+from services.audio_file_cache import audio_file_cache
+from services.playback_governor import playback_governor
+from services.track_index_service import TrackIndexService
+
+# Tentativas de preparar a próxima música antes de retirá-la da fila
+PREFETCH_ATTEMPTS = 3
+PREFETCH_RETRY_DELAY = 2
+
+FFMPEG_OPTIONS = {
+    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
+    'options': '-vn',
+}
+
+# Bitrate (kbps) usado apenas quando o áudio precisa ser convertido para Opus
+TRANSCODE_BITRATE = 96
+
+# Intervalo entre as verificações de players ociosos, em segundos
+IDLE_CHECK_INTERVAL = 60
+
+# (título, url original)
+Song = Tuple[str, str]
+
+async def get_audio_codec(track: AudioTrack) -> Optional[str]:
+    """Codec do áudio: o informado pelo yt-dlp ou, se desconhecido, o sondado pelo ffprobe"""
+    if track.acodec and track.acodec != 'none':
+        return track.acodec
+    async with playback_governor.probe():
+        codec, _ = await discord.FFmpegOpusAudio.probe(track.stream_url)
+    return codec
+
+def seek_options(position: float) -> str:
+    # Opção do ffmpeg para começar a tocar a partir de `position` segundos
+    return f"-ss {position:.1f}" if position > 0 else ''
+
+def create_audio_source(audio_url: str, codec: Optional[str], position: float = 0.0) -> discord.FFmpegOpusAudio:
+    # Áudio já em Opus é repassado sem recodificar (codec copy); os demais são convertidos
+    options = dict(FFMPEG_OPTIONS)
+    if position > 0:
+        options['before_options'] = f"{seek_options(position)} {options['before_options']}"
+    return discord.FFmpegOpusAudio(audio_url, codec=codec, bitrate=TRANSCODE_BITRATE, **options)
+
+class MusicPlayer:
+    """
+    Estado de música de um servidor: fila, histórico e reprodução.
+
+    A fila é um deque (retirar a próxima música é O(1)) e o histórico guarda
+    apenas as últimas `history_size` músicas.
+    """
+
+    def __init__(
+        self,
+        guild_id: int,
+        history_size: int,
+        on_track_start: Callable[["MusicPlayer", str], Awaitable[None]] | None = None,
+        on_stop: Callable[["MusicPlayer"], Awaitable[None]] | None = None,
+        track_index: TrackIndexService | None = None
+    ):
+        self.guild_id = guild_id
+        self.queue: Deque[Song] = deque()
+        self.history: Deque[Song] = deque(maxlen=history_size)
+        self.voice_client: discord.VoiceClient | None = None
+        # Canal onde fica a mensagem "Tocando agora", editada a cada troca de música
+        self.text_channel: discord.abc.Messageable | None = None
+        self.now_playing_message: discord.Message | None = None
+        self.current: Song | None = None
+        self.on_track_start = on_track_start
+        self.on_stop = on_stop
+        self.track_index = track_index
+        self.last_activity = time.monotonic()
+        self.closed = False
+        # Troca de faixa (play_next) em andamento, cancelada se o player for descartado
+        self._start_task: asyncio.Task[Optional[str]] | None = None
+        # Momento (monotônico) em que a música atual estaria no segundo 0 e em que foi pausada
+        self._track_started: float | None = None
+        self._paused_at: float | None = None
+        # Segundo em que a próxima música começa (retomada após um reinício)
+        self._start_position = 0.0
+        # Próxima música já resolvida e sondada: (url original, link de áudio, codec)
+        self._prefetched: Tuple[str, str, Optional[str]] | None = None
+        self._prefetch_task: asyncio.Task | None = None
+
+    @property
+    def is_active(self) -> bool:
+        vc = self.voice_client
+        return vc is not None and vc.is_connected() and (vc.is_playing() or vc.is_paused())
+
+    @property
+    def position(self) -> float:
+        """Segundos já tocados da música atual, descontadas as pausas"""
+        if self.current is None or self._track_started is None:
+            return 0.0
+        now = self._paused_at if self._paused_at is not None else time.monotonic()
+        return max(0.0, now - self._track_started)
+
+    @property
+    def is_paused(self) -> bool:
+        """
+        Se a música atual foi pausada pelo player.
+
+        Não depende do canal de voz: continua valendo depois que a desconexão
+        no desligamento para o áudio.
+        """
+        return self.current is not None and self._paused_at is not None
+
+    @property
+    def is_starting(self) -> bool:
+        """Se a próxima música está sendo preparada para tocar"""
+        return self._start_task is not None
+
+    def touch(self) -> None:
+        self.last_activity = time.monotonic()
+
+    def pause(self) -> None:
+        if self.voice_client is not None:
+            self.voice_client.pause()
+        if self._paused_at is None:
+            self._paused_at = time.monotonic()
+        self.touch()
+
+    def resume(self) -> None:
+        if self.voice_client is not None:
+            self.voice_client.resume()
+        if self._paused_at is not None and self._track_started is not None:
+            self._track_started += time.monotonic() - self._paused_at
+        self._paused_at = None
+        self.touch()
+
+    def start_next_at(self, position: float) -> None:
+        """Faz a próxima música tocada começar em `position` segundos"""
+        self._start_position = position
+
+    def is_idle(self, timeout: float, now: float | None = None) -> bool:
+        """
+        Se o player está parado (sem tocar nem pausado) há mais de `timeout` segundos.
+
+        Um player preparando a próxima música, inclusive aguardando uma vaga de
+        reprodução, não está ocioso.
+        """
+        now = time.monotonic() if now is None else now
+        return not self.is_active and not self.is_starting and now - self.last_activity > timeout
+
+    async def play_next(self) -> None:
+        """Toca a próxima música da fila; sem músicas, sai do canal de voz"""
+        if self._start_task is not None:
+            # Já há uma troca de faixa em andamento, que vai tocar a primeira música da fila
+            return
+        # Em uma task própria para que o teardown possa cancelá-la (por exemplo, na espera por vaga)
+        task = self._start_task = asyncio.create_task(self._run_start())
+        try:
+            title = await task
+        except asyncio.CancelledError:
+            if not self.closed:
+                raise
+            # Player descartado durante a troca de faixa
+            return
+        finally:
+            # Se a task foi cancelada antes de começar, o finally de _run_start não rodou
+            if self._start_task is task:
+                self._start_task = None
+
+        if title is not None and self.on_track_start:
+            try:
+                await self.on_track_start(self, title)
+            except Exception as e:
+                print(f"Erro ao anunciar a música atual: {e}")
+
+    async def _run_start(self) -> Optional[str]:
+        try:
+            return await self._start_next_song()
+        finally:
+            # No mesmo passo do vc.play: o `after` da nova faixa já encontra a troca concluída
+            if self._start_task is asyncio.current_task():
+                self._start_task = None
+
+    async def _start_next_song(self) -> Optional[str]:
+        # Inicia a próxima música que puder ser extraída; retorna o título dela, se tocou
+        while True:
+            vc = self.voice_client
+            if self.closed or vc is None or not vc.is_connected():
+                return None
+            self.touch()
+            if not self.queue:
+                self.current = None
+                self._track_started = self._paused_at = None
+                await playback_governor.release_stream(self.guild_id)
+                await self._notify_stop()
+                await vc.disconnect()
+                return None
+
+            # Uma vaga de reprodução por servidor, mantida entre as faixas
+            await playback_governor.acquire_stream(self.guild_id)
+            if self.closed:
+                await playback_governor.release_stream(self.guild_id)
+                return None
+            if vc.is_playing() or vc.is_paused():
+                # Outra música começou enquanto esperávamos; ela chama play_next ao terminar
+                return None
+
+            # Pegue o título e a URL original da fila
+            title, url = self.queue.popleft()
+            prefetched, self._prefetched = self._prefetched, None
+            position, self._start_position = self._start_position, 0.0
+            self._cancel_prefetch_task()
+
+            cache_key = track_cache_key(url)
+            cached_path = audio_file_cache.get(cache_key)
+            if cached_path:
+                # Já gravada em disco em Opus: tocar sem yt-dlp nem download
+                source = discord.FFmpegOpusAudio(cached_path, codec='opus', before_options=seek_options(position))
+            else:
+                # Obtenha o link de áudio imediatamente antes de tocar (do cache, se ainda válido)
+                try:
+                    track = await audio_extraction_service.get_track(url)
+                except AudioExtractionError as e:
+                    print(f"Erro ao extrair áudio de {title}: {e}")
+                    continue
+
+                if prefetched and prefetched[:2] == (url, track.stream_url):
+                    # Já sondado durante a música anterior
+                    codec = prefetched[2]
+                else:
+                    codec = await get_audio_codec(track)
+                source = create_audio_source(track.stream_url, codec, position)
+                audio_file_cache.store(cache_key, track)
+
+            if self.closed or not vc.is_connected():
+                source.cleanup()
+                if not self.closed:
+                    # Desconectado no meio da troca (por exemplo, no desligamento): manter a música na fila
+                    self.queue.appendleft((title, url))
+                return None
+
+            self.current = (title, url)
+            self._track_started = time.monotonic() - position
+            self._paused_at = None
+            self.history.append((title, url))
+            if self.track_index:
+                self.track_index.record(self.guild_id, title, url)
+            loop = asyncio.get_running_loop()
+
+            def after_playing(error):
+                fut = asyncio.run_coroutine_threadsafe(self.play_next(), loop)
+                try:
+                    fut.result()
+                except Exception as e:
+                    print(f"Erro ao tocar próxima música: {e}")
+
+            # Sem await entre aqui e o fim da troca: o `after` só roda com ela concluída
+            vc.play(source, after=after_playing)
+            self.schedule_prefetch()
+            return title
+
+    def schedule_prefetch(self) -> None:
+        """Prepara em segundo plano a próxima música da fila, se ainda não estiver pronta"""
+        if self._prefetch_task and not self._prefetch_task.done():
+            return
+        if not self.queue or (self._prefetched and self._prefetched[0] == self.queue[0][1]):
+            return
+        self._prefetch_task = asyncio.create_task(self._prefetch_next_song())
+
+    async def teardown(self) -> None:
+        """Descarta a fila e o histórico e sai do canal de voz"""
+        self.closed = True
+        self._cancel_prefetch_task()
+        task, self._start_task = self._start_task, None
+        if task is not None:
+            # Sai da espera por uma vaga (acquire_stream trata o cancelamento) antes de liberar a do servidor
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._prefetched = None
+        self.queue.clear()
+        self.history.clear()
+        self.current = None
+        self._track_started = self._paused_at = None
+        vc, self.voice_client = self.voice_client, None
+        if vc is not None and vc.is_connected():
+            await vc.disconnect()
+        await playback_governor.release_stream(self.guild_id)
+        await self._notify_stop()
+
+    async def _notify_stop(self) -> None:
+        if self.on_stop:
+            try:
+                await self.on_stop(self)
+            except Exception as e:
+                print(f"Erro ao atualizar a mensagem do player: {e}")
+
+    def _cancel_prefetch_task(self) -> None:
+        task, self._prefetch_task = self._prefetch_task, None
+        if task:
+            task.cancel()
+
+    async def _prefetch_next_song(self) -> None:
+        """
+        Resolve o link de áudio e o codec da próxima música enquanto a atual toca,
+        para que a troca de faixa não espere pelo yt-dlp nem pelo ffprobe.
+
+        Músicas cuja extração continua falhando após algumas tentativas são
+        retiradas da fila antes de chegar a vez delas; codec desconhecido não
+        conta como falha. Em seguida, as músicas seguintes (por exemplo, as de
+        uma playlist) são resolvidas em paralelo, algumas de cada vez.
+        """
+        while self.queue and not await self._prepare_song():
+            pass
+        await self._resolve_ahead()
+
+    async def _prepare_song(self) -> bool:
+        # Prepara a primeira música da fila; retorna False se ela teve de ser removida
+        queue = self.queue
+        title, url = queue[0]
+        if audio_file_cache.get(track_cache_key(url)):
+            # Será tocada do disco; nada a preparar
+            return True
+        for attempt in range(PREFETCH_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(PREFETCH_RETRY_DELAY * attempt)
+            if not queue or queue[0] != (title, url):
+                # A fila mudou enquanto esperávamos; preparar a nova primeira música
+                return False
+            try:
+                track = await audio_extraction_service.get_track(url)
+            except AudioExtractionError as e:
+                print(f"Erro ao pré-carregar {title}: {e}")
+                continue
+            # Codec desconhecido (None) não é falha: a música é convertida para Opus ao tocar
+            codec = await get_audio_codec(track)
+            self._prefetched = (url, track.stream_url, codec)
+            return True
+        if queue and queue[0] == (title, url):
+            queue.popleft()
+            print(f"Música removida da fila após {PREFETCH_ATTEMPTS} falhas: {title}")
+        return False
+
+    async def _resolve_ahead(self) -> None:
+        # Os links ficam no cache de faixas; falhas serão tratadas quando cada uma chegar à frente
+        urls = [url for _, url in islice(self.queue, 1, QUEUE_RESOLVE_AHEAD)]
+        await asyncio.gather(
+            *(
+                audio_extraction_service.get_track(url)
+                for url in urls
+                if not audio_file_cache.get(track_cache_key(url))
+            ),
+            return_exceptions=True
+        )
+
+class MusicPlayerManager:
+    """
+    Players de música por servidor, criados sob demanda.
+
+    Players parados há mais de `idle_timeout` segundos (fila tocada até o fim,
+    bot removido da call) são descartados periodicamente, de modo que a memória
+    usada não cresce com o número de servidores que já tocaram música.
+    """
+
+    def __init__(self, history_size: int, idle_timeout: float):
+        self.history_size = history_size
+        self.idle_timeout = idle_timeout
+        # Chamados a cada música iniciada e quando a reprodução termina, para avisar o canal
+        self.on_track_start: Callable[[MusicPlayer, str], Awaitable[None]] | None = None
+        self.on_stop: Callable[[MusicPlayer], Awaitable[None]] | None = None
+        # Índice de títulos alimentado pelas músicas tocadas (sugestões do /add_song)
+        self.track_index: TrackIndexService | None = None
+        self._players: Dict[int, MusicPlayer] = {}
+        self._monitor: asyncio.Task | None = None
+
+    def get(self, guild_id: int) -> MusicPlayer:
+        """Player do servidor, criado se ainda não existir"""
+        player = self._players.get(guild_id)
+        if player is None:
+            player = self._players[guild_id] = MusicPlayer(
+                guild_id, self.history_size, self.on_track_start, self.on_stop, self.track_index
+            )
+        return player
+
+    def find(self, guild_id: int) -> Optional[MusicPlayer]:
+        """Player do servidor, se existir"""
+        return self._players.get(guild_id)
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def players(self) -> List[MusicPlayer]:
+        return list(self._players.values())
+
+    async def remove(self, guild_id: int) -> None:
+        """Descarta o player do servidor, saindo do canal de voz"""
+        player = self._players.pop(guild_id, None)
+        if player is not None:
+            await player.teardown()
+
+    async def remove_idle(self, now: float | None = None) -> int:
+        """Descarta os players ociosos; retorna quantos foram removidos"""
+        idle = [guild_id for guild_id, player in self._players.items() if player.is_idle(self.idle_timeout, now)]
+        for guild_id in idle:
+            await self.remove(guild_id)
+        return len(idle)
+
+    def start(self) -> None:
+        """Inicia a verificação periódica de players ociosos"""
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._monitor_idle())
+
+    async def close(self) -> None:
+        """Para a verificação e descarta todos os players"""
+        monitor, self._monitor = self._monitor, None
+        if monitor is not None:
+            monitor.cancel()
+        for guild_id in list(self._players):
+            await self.remove(guild_id)
+
+    async def _monitor_idle(self) -> None:
+        while True:
+            await asyncio.sleep(IDLE_CHECK_INTERVAL)
+            try:
+                await self.remove_idle()
+            except Exception as e:
+                print(f"Erro ao remover players ociosos: {e}")
+
+# Players compartilhados pelos comandos de música
+music_players = MusicPlayerManager(MUSIC_HISTORY_SIZE, MUSIC_IDLE_TIMEOUT)
@@ -0,0 +1,173 @@
+import asyncio
+import discord
+from datetime import datetime
+from typing import List, Optional, Set
+from models.music_session import MusicSession
+from repositories.music_session_repository import MusicSessionRepository
+from services.music_player import MusicPlayer, MusicPlayerManager
+
+class MusicSessionService:
+    """
+    Salva as filas de música no banco e as retoma depois de um reinício.
+
+    A cada `interval` segundos (e no desligamento) a fila, a música atual e a
+    posição de cada servidor tocando são gravadas. Quando o bot volta, cada
+    servidor cuja sessão tem menos de `max_age` segundos e cujo canal de voz
+    ainda tem alguém reconecta e continua a música de onde parou. Só a música
+    atual é extraída de novo na hora; o resto da fila é resolvido conforme
+    chega a vez, como em uma fila normal.
+    """
+
+    def __init__(
+        self,
+        session_repository: MusicSessionRepository,
+        players: MusicPlayerManager,
+        interval: float,
+        max_age: float
+    ):
+        self.session_repository = session_repository
+        self.players = players
+        self.interval = interval
+        self.max_age = max_age
+        # Servidores com sessão gravada no banco
+        self._saved: Set[int] = set()
+        self._restored = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Inicia a gravação periódica das sessões"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._save_periodically())
+
+    async def close(self) -> None:
+        """Para a gravação periódica e grava as sessões uma última vez"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+        # No desligamento os players podem já ter saído da call: não apagar sessões
+        await self.save_all(delete_stale=False)
+
+    async def save_all(self, delete_stale: bool = True) -> None:
+        """Grava a sessão de cada servidor tocando e apaga as dos que pararam"""
+        sessions = [session for session in map(self.snapshot, self.players.players()) if session]
+        saved = set()
+        for session in sessions:
+            try:
+                await self.session_repository.save_session(session)
+                saved.add(session.guild_id)
+            except Exception as e:
+                print(f"Erro ao salvar a fila de músicas do servidor {session.guild_id}: {e}")
+
+        if delete_stale:
+            for guild_id in self._saved - saved:
+                await self._delete(guild_id)
+            self._saved = saved
+        else:
+            self._saved |= saved
+
+    @staticmethod
+    def snapshot(player: MusicPlayer) -> Optional[MusicSession]:
+        """Sessão do player, ou None se não há nada a retomar"""
+        vc = player.voice_client
+        channel = getattr(vc, 'channel', None)
+        if player.closed or channel is None or (player.current is None and not player.queue):
+            return None
+        message = player.now_playing_message
+        return MusicSession(
+            guild_id=player.guild_id,
+            voice_channel_id=channel.id,
+            text_channel_id=getattr(player.text_channel, 'id', None),
+            now_playing_message_id=message.id if message is not None else None,
+            current=player.current,
+            position=player.position,
+            # Do player, não do canal de voz: no desligamento o bot.close() já parou o áudio
+            paused=player.is_paused,
+            queue=list(player.queue)
+        )
+
+    async def restore(self, guilds: List[discord.Guild]) -> int:
+        """
+        Retoma as sessões salvas dos servidores; só age na primeira chamada.
+
+        Args:
+            guilds: Servidores em que o bot está
+
+        Returns:
+            Quantos servidores voltaram a tocar
+        """
+        if self._restored:
+            return 0
+        self._restored = True
+
+        starting = []
+        for guild in guilds:
+            try:
+                session = await self.session_repository.get_session(guild.id)
+            except Exception as e:
+                print(f"Erro ao carregar a fila de músicas do servidor {guild.id}: {e}")
+                continue
+            if session is None:
+                continue
+
+            player = await self._restore_session(guild, session)
+            if player is None:
+                await self._delete(guild.id)
+                continue
+            self._saved.add(guild.id)
+            starting.append(self._start(player, session.paused))
+
+        # As extrações das músicas atuais passam pelo pool do yt-dlp, algumas de cada vez
+        await asyncio.gather(*starting, return_exceptions=True)
+        return len(starting)
+
+    async def _restore_session(self, guild: discord.Guild, session: MusicSession) -> Optional[MusicPlayer]:
+        if (datetime.now() - session.saved_at).total_seconds() > self.max_age:
+            return None
+        channel = guild.get_channel(session.voice_channel_id)
+        if not isinstance(channel, discord.VoiceChannel) or not any(not member.bot for member in channel.members):
+            # Canal apagado ou vazio: ninguém para ouvir
+            return None
+
+        player = self.players.get(guild.id)
+        if player.current is not None or player.queue:
+            # Alguém já voltou a tocar música antes da retomada
+            return None
+        try:
+            vc = guild.voice_client or await channel.connect()
+        except Exception as e:
+            print(f"Erro ao reconectar ao canal de voz do servidor {guild.id}: {e}")
+            return None
+
+        player.voice_client = vc
+        text_channel = guild.get_channel(session.text_channel_id) if session.text_channel_id else None
+        if isinstance(text_channel, discord.TextChannel):
+            player.text_channel = text_channel
+            if session.now_playing_message_id:
+                # Continuar editando a mensagem "Tocando agora" de antes do reinício
+                player.now_playing_message = text_channel.get_partial_message(session.now_playing_message_id)
+        if session.current is not None:
+            player.queue.append(session.current)
+            player.start_next_at(session.position)
+        player.queue.extend(session.queue)
+        player.touch()
+        return player
+
+    async def _start(self, player: MusicPlayer, paused: bool) -> None:
+        await player.play_next()
+        vc = player.voice_client
+        if paused and vc is not None and vc.is_playing():
+            player.pause()
+
+    async def _delete(self, guild_id: int) -> None:
+        try:
+            await self.session_repository.delete_session(guild_id)
+        except Exception as e:
+            print(f"Erro ao apagar a fila de músicas salva do servidor {guild_id}: {e}")
+
+    async def _save_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save_all()
+            except Exception as e:
+                print(f"Erro ao salvar as filas de músicas: {e}")
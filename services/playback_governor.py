@@ -0,0 +1,108 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Set
+from config import PLAYBACK_MAX_STREAMS, PLAYBACK_MAX_PROBES, PLAYBACK_MAX_WAITING
+
+@dataclass
+class PlaybackLoad:
+    """Retrato da carga de reprodução do processo"""
+    active_streams: int
+    max_streams: int
+    waiting_streams: int
+    max_waiting: int
+    active_probes: int
+    waiting_probes: int
+    max_probes: int
+
+class PlaybackGovernor:
+    """
+    Limita os processos ffmpeg de todos os servidores juntos.
+
+    Cada servidor tocando música ocupa uma vaga (o processo ffmpeg da faixa
+    atual) até a fila acabar ou o player ser descartado; trocar de faixa não
+    libera a vaga. Com todas as vagas ocupadas, até `max_waiting` servidores
+    aguardam sua vez em ordem de chegada e os demais são recusados. As
+    sondagens com ffprobe têm um limite próprio.
+
+    As gravações do cache em disco (`AudioFileCache`) também usam ffmpeg, mas
+    não contam aqui: elas têm seu próprio limite, `MAX_CONCURRENT_SAVES`
+    processos ao mesmo tempo.
+    """
+
+    def __init__(self, max_streams: int, max_probes: int, max_waiting: int):
+        self.max_streams = max_streams
+        self.max_probes = max_probes
+        self.max_waiting = max_waiting
+        self.waiting_streams = 0
+        self.active_probes = 0
+        self.waiting_probes = 0
+        self._streams: Set[int] = set()
+        self._condition = asyncio.Condition()
+        self._probe_semaphore = asyncio.Semaphore(max_probes)
+
+    def holds_stream(self, guild_id: int) -> bool:
+        return guild_id in self._streams
+
+    def can_admit(self, guild_id: int) -> bool:
+        """Se o servidor pode tocar agora, sem esperar por uma vaga"""
+        return self.holds_stream(guild_id) or (len(self._streams) < self.max_streams and not self.waiting_streams)
+
+    def can_wait(self) -> bool:
+        """Se ainda cabe mais um servidor na espera por uma vaga"""
+        return self.waiting_streams < self.max_waiting
+
+    async def acquire_stream(self, guild_id: int) -> None:
+        """Ocupa uma vaga para o servidor, aguardando em ordem de chegada se necessário"""
+        if self.can_admit(guild_id):
+            self._streams.add(guild_id)
+            return
+
+        async with self._condition:
+            self.waiting_streams += 1
+            try:
+                await self._condition.wait_for(lambda: len(self._streams) < self.max_streams)
+            except asyncio.CancelledError:
+                # Repassar a vaga que pode ter sido sinalizada para esta espera
+                self._condition.notify()
+                raise
+            finally:
+                self.waiting_streams -= 1
+            self._streams.add(guild_id)
+
+    async def release_stream(self, guild_id: int) -> None:
+        """Libera a vaga do servidor, acordando o próximo da espera"""
+        if guild_id not in self._streams:
+            return
+        self._streams.discard(guild_id)
+        async with self._condition:
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def probe(self) -> AsyncIterator[None]:
+        """Limita as sondagens com ffprobe executadas ao mesmo tempo"""
+        self.waiting_probes += 1
+        try:
+            await self._probe_semaphore.acquire()
+        finally:
+            self.waiting_probes -= 1
+        self.active_probes += 1
+        try:
+            yield
+        finally:
+            self.active_probes -= 1
+            self._probe_semaphore.release()
+
+    def load(self) -> PlaybackLoad:
+        return PlaybackLoad(
+            active_streams=len(self._streams),
+            max_streams=self.max_streams,
+            waiting_streams=self.waiting_streams,
+            max_waiting=self.max_waiting,
+            active_probes=self.active_probes,
+            waiting_probes=self.waiting_probes,
+            max_probes=self.max_probes
+        )
+
+# Limites compartilhados por todos os servidores
+playback_governor = PlaybackGovernor(PLAYBACK_MAX_STREAMS, PLAYBACK_MAX_PROBES, PLAYBACK_MAX_WAITING)
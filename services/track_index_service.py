@@ -0,0 +1,221 @@
+import asyncio
+import unicodedata
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+from models.played_track import PlayedTrack
+from repositories.track_repository import TrackRepository
+from services.audio_extraction_service import track_cache_key
+from services.cache import InFlight, TTLCache
+
+# Segundos entre tocar uma música e gravar o registro no banco (gravações em lote)
+FLUSH_DELAY = 5.0
+
+# Semelhança mínima (trigramas em comum / trigramas da busca) para sugerir um título
+MIN_TRIGRAM_SIMILARITY = 0.4
+
+def normalize_title(text: str) -> str:
+    """Minúsculas, sem acentos e apenas letras/números separados por um espaço"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    cleaned = ''.join(char if char.isalnum() else ' ' for char in without_accents.casefold())
+    return ' '.join(cleaned.split())
+
+def title_trigrams(normalized: str) -> Set[str]:
+    """Trigramas de cada palavra, com bordas, como no pg_trgm"""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+@dataclass
+class IndexedTrack:
+    title: str
+    url: str
+    play_count: int
+    normalized: str
+
+class TrackIndex:
+    """
+    Índice em memória dos títulos tocados em um servidor.
+
+    Guarda as palavras de cada título em uma lista ordenada (busca por prefixo
+    com bisect) e os trigramas em listas invertidas (busca aproximada, que
+    tolera erros de digitação).
+    """
+
+    def __init__(self, max_tracks: int):
+        self.max_tracks = max_tracks
+        self._tracks: Dict[str, IndexedTrack] = {}
+        self._words: List[Tuple[str, str]] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def add(self, video_id: str, title: str, url: str, play_count: int = 1) -> None:
+        """Indexa uma música ou soma `play_count` às reproduções de uma já indexada"""
+        track = self._tracks.get(video_id)
+        if track is not None and track.title == title:
+            track.play_count += play_count
+            track.url = url
+            return
+
+        if track is not None:
+            # O título mudou: reindexar
+            play_count += track.play_count
+            self.remove(video_id)
+        elif len(self._tracks) >= self.max_tracks:
+            # Índice cheio: descartar a música menos tocada
+            least_played = min(self._tracks, key=lambda key: self._tracks[key].play_count)
+            self.remove(least_played)
+
+        normalized = normalize_title(title)
+        self._tracks[video_id] = IndexedTrack(title, url, play_count, normalized)
+        for word in set(normalized.split()):
+            insort(self._words, (word, video_id))
+        for gram in title_trigrams(normalized):
+            self._trigrams.setdefault(gram, set()).add(video_id)
+
+    def remove(self, video_id: str) -> None:
+        track = self._tracks.pop(video_id, None)
+        if track is None:
+            return
+
+        for word in set(track.normalized.split()):
+            index = bisect_left(self._words, (word, video_id))
+            if index < len(self._words) and self._words[index] == (word, video_id):
+                del self._words[index]
+        for gram in title_trigrams(track.normalized):
+            video_ids = self._trigrams.get(gram)
+            if video_ids is not None:
+                video_ids.discard(video_id)
+                if not video_ids:
+                    del self._trigrams[gram]
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, str]]:
+        """
+        Títulos mais parecidos com o texto digitado.
+
+        Títulos que começam com o texto vêm primeiro, depois os que têm uma
+        palavra começando com a última palavra digitada e, por fim, os
+        parecidos por trigramas; empates são decididos pelas reproduções.
+
+        Args:
+            query: Texto digitado
+            limit: Máximo de sugestões
+
+        Returns:
+            Lista de (título, url)
+        """
+        normalized = normalize_title(query)
+        if not normalized:
+            ranked = sorted(self._tracks.values(), key=lambda track: -track.play_count)
+            return [(track.title, track.url) for track in ranked[:limit]]
+
+        scores: Dict[str, float] = {}
+
+        # Similaridade por trigramas
+        query_grams = title_trigrams(normalized)
+        shared: Dict[str, int] = {}
+        for gram in query_grams:
+            for video_id in self._trigrams.get(gram, ()):
+                shared[video_id] = shared.get(video_id, 0) + 1
+        for video_id, count in shared.items():
+            similarity = count / len(query_grams)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                scores[video_id] = similarity
+
+        # Palavras que começam com a última palavra digitada (ainda incompleta)
+        last_word = normalized.rsplit(' ', 1)[-1]
+        index = bisect_left(self._words, (last_word,))
+        while index < len(self._words) and self._words[index][0].startswith(last_word):
+            video_id = self._words[index][1]
+            scores[video_id] = scores.get(video_id, 0.0) + 1.0
+            index += 1
+
+        for video_id in scores:
+            if self._tracks[video_id].normalized.startswith(normalized):
+                scores[video_id] += 2.0
+
+        ranked = sorted(scores, key=lambda video_id: (-scores[video_id], -self._tracks[video_id].play_count))
+        return [(self._tracks[video_id].title, self._tracks[video_id].url) for video_id in ranked[:limit]]
+
+class TrackIndexService:
+    """
+    Sugestões de músicas para o /add_song a partir das já tocadas no servidor.
+
+    O índice de cada servidor é carregado do banco na primeira busca e mantido
+    em memória (os servidores usados há mais tempo são descartados); as
+    reproduções entram no índice na hora e são gravadas no banco em lote.
+    """
+
+    def __init__(self, track_repository: TrackRepository, max_tracks: int, max_guilds: int):
+        self.track_repository = track_repository
+        self.max_tracks = max_tracks
+        self._indexes: TTLCache[int, TrackIndex] = TTLCache(max_entries=max_guilds)
+        self._loading: InFlight[int, TrackIndex] = InFlight()
+        self._pending: Dict[int, Dict[str, PlayedTrack]] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    async def suggest(self, guild_id: int, query: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """Lista de (título, url) das músicas do servidor parecidas com `query`"""
+        index = await self._get_index(guild_id)
+        return index.search(query, limit)
+
+    def record(self, guild_id: int, title: str, url: str) -> None:
+        """Registra uma música tocada no servidor"""
+        video_id = track_cache_key(url)
+        index = self._indexes.get(guild_id)
+        if index is not None:
+            index.add(video_id, title, url)
+
+        pending = self._pending.setdefault(guild_id, {})
+        track = pending.get(video_id)
+        if track is None:
+            pending[video_id] = PlayedTrack(guild_id=guild_id, video_id=video_id, title=title, url=url)
+        else:
+            track.play_count += 1
+            track.title, track.url = title, url
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """Grava no banco as reproduções pendentes"""
+        pending, self._pending = self._pending, {}
+        for guild_id, tracks in pending.items():
+            try:
+                await self.track_repository.record_plays(guild_id, list(tracks.values()))
+            except Exception as e:
+                print(f"Erro ao registrar músicas tocadas no servidor {guild_id}: {e}")
+
+    async def close(self) -> None:
+        """Cancela a gravação agendada e grava o que estiver pendente"""
+        task, self._flush_task = self._flush_task, None
+        if task is not None:
+            task.cancel()
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(FLUSH_DELAY)
+        await self.flush()
+
+    async def _get_index(self, guild_id: int) -> TrackIndex:
+        index = self._indexes.get(guild_id)
+        if index is not None:
+            return index
+
+        # Buscas simultâneas do mesmo servidor aguardam a mesma carga
+        return await self._loading.run(guild_id, lambda: self._load_index(guild_id))
+
+    async def _load_index(self, guild_id: int) -> TrackIndex:
+        index = TrackIndex(self.max_tracks)
+        for track in await self.track_repository.get_tracks(guild_id, self.max_tracks):
+            index.add(track.video_id, track.title, track.url, track.play_count)
+        # Reproduções que ainda não chegaram ao banco
+        for track in self._pending.get(guild_id, {}).values():
+            index.add(track.video_id, track.title, track.url, track.play_count)
+        self._indexes.set(guild_id, index)
+        return index
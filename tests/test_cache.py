@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+from services.cache import InFlight
+
+class InFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_execution(self):
+        in_flight: InFlight[str, int] = InFlight()
+        calls = 0
+
+        async def load() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return 42
+
+        results = await asyncio.gather(*(in_flight.run("chave", load) for _ in range(5)))
+
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(in_flight), 0)
+
+    async def test_cancelled_waiter_does_not_cancel_the_others(self):
+        in_flight: InFlight[str, int] = InFlight()
+        release = asyncio.Event()
+
+        async def load() -> int:
+            await release.wait()
+            return 7
+
+        first = asyncio.create_task(in_flight.run("chave", load))
+        second = asyncio.create_task(in_flight.run("chave", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        self.assertEqual(await second, 7)
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+    async def test_failure_is_shared_and_key_released(self):
+        in_flight: InFlight[str, int] = InFlight()
+
+        async def fail() -> int:
+            raise ValueError("falhou")
+
+        results = await asyncio.gather(*(in_flight.run("chave", fail) for _ in range(3)), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(await in_flight.run("chave", lambda: asyncio.sleep(0, result=1)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
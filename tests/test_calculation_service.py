@@ -0,0 +1,76 @@
+import random
+import unittest
+from models.expense_batch import ExpenseBatch
+from services.calculation_service import CalculationService
+
+def apply_payments(balance_cents, payments):
+    """Saldos depois de executar os pagamentos (devem ficar todos zerados)"""
+    remaining = dict(balance_cents)
+    for debtor, creditor, amount in payments:
+        remaining[debtor] += amount
+        remaining[creditor] -= amount
+    return remaining
+
+class CalculateExpensesTest(unittest.TestCase):
+    def test_empty_batch(self):
+        calculation = CalculationService.calculate_expenses(ExpenseBatch())
+        self.assertEqual(calculation.people_count, 0)
+        self.assertEqual(calculation.payments, [])
+
+    def test_balances_sum_to_zero_and_payments_settle_them(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            people = [f"Pessoa {index}" for index in range(rng.randint(1, 12))]
+            expenses = ExpenseBatch.from_tuples(
+                (round(rng.uniform(0.01, 500), 2), "Despesa", rng.choice(people))
+                for _ in range(rng.randint(1, 50))
+            )
+            calculation = CalculationService.calculate_expenses(expenses)
+
+            balance_cents = {
+                person: round(balance * 100) for person, balance in calculation.balance_by_person.items()
+            }
+            self.assertEqual(sum(balance_cents.values()), 0)
+
+            payments = [(debtor, creditor, round(amount * 100)) for debtor, creditor, amount in calculation.payments]
+            self.assertTrue(all(amount > 0 for _, _, amount in payments))
+            self.assertEqual(set(apply_payments(balance_cents, payments).values()), {0})
+            self.assertLessEqual(len(payments), max(calculation.people_count - 1, 0))
+
+    def test_leftover_cents_go_to_first_people_alphabetically(self):
+        # R$ 100,00 entre 3 pessoas: cotas de 33,34 + 33,33 + 33,33
+        expenses = ExpenseBatch.from_tuples([(100.0, "Mercado", "Carla"), (0.0, "Nada", "Ana"), (0.0, "Nada", "Bruno")])
+        calculation = CalculationService.calculate_expenses(expenses)
+
+        self.assertEqual(calculation.balance_by_person, {"Ana": -33.34, "Bruno": -33.33, "Carla": 66.67})
+        self.assertEqual(
+            sorted(calculation.payments),
+            [("Ana", "Carla", 33.34), ("Bruno", "Carla", 33.33)]
+        )
+
+    def test_decimal_values_do_not_create_phantom_cents(self):
+        # Em float, 0.1 + 0.2 != 0.3; em centavos as contas fecham exatamente
+        expenses = ExpenseBatch.from_tuples([(0.1, "A", "Ana"), (0.2, "B", "Ana"), (0.3, "C", "Bruno")])
+        calculation = CalculationService.calculate_expenses(expenses)
+
+        self.assertEqual(calculation.balance_by_person, {"Ana": 0.0, "Bruno": 0.0})
+        self.assertEqual(calculation.payments, [])
+
+class SettleBalancesTest(unittest.TestCase):
+    def test_at_most_n_minus_one_transfers(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            people = [f"P{index}" for index in range(rng.randint(2, 30))]
+            balance_cents = {person: rng.randint(-10_000, 10_000) for person in people[:-1]}
+            balance_cents[people[-1]] = -sum(balance_cents.values())
+
+            payments = CalculationService.settle_balances(balance_cents)
+
+            self.assertLessEqual(len(payments), len(people) - 1)
+            self.assertEqual(set(apply_payments(balance_cents, payments).values()), {0})
+
+    def test_settled_balances_need_no_payments(self):
+        self.assertEqual(CalculationService.settle_balances({"Ana": 0, "Bruno": 0}), [])
+
+if __name__ == "__main__":
+    unittest.main()
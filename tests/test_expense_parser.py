@@ -0,0 +1,31 @@
+import unittest
+from models.expense_batch import MAX_CENTS, MAX_VALUE, ExpenseBatch
+from services.expense_parser import analyze_message_content
+
+class AnalyzeMessageContentTest(unittest.TestCase):
+    def test_valid_and_invalid_lines(self):
+        valid, invalid = analyze_message_content("- 12,50;Almoço;Ana\n- 10 Uber Bia\nbom dia")
+        self.assertEqual(valid, [(12.5, "Almoço", "Ana")])
+        self.assertEqual(invalid, ["- 10 Uber Bia"])
+
+    def test_non_finite_and_oversized_values_are_invalid(self):
+        # Centavos acima de 64 bits não cabem no ExpenseBatch e derrubariam o canal inteiro
+        content = "- nan;x;Ana\n- inf;x;Ana\n- 1e20;x;Ana\n- 10;y;Bia"
+        valid, invalid = analyze_message_content(content)
+
+        self.assertEqual(valid, [(10.0, "y", "Bia")])
+        self.assertEqual(invalid, ["- nan;x;Ana", "- inf;x;Ana", "- 1e20;x;Ana"])
+        batch = ExpenseBatch()
+        batch.extend(valid)
+        self.assertEqual(len(batch), 1)
+
+    def test_largest_accepted_value_fits_in_cents(self):
+        valid, invalid = analyze_message_content(f"- {MAX_VALUE};x;Ana\n- -{MAX_VALUE};x;Bia\n- {MAX_VALUE * 1.01};x;Ana")
+
+        self.assertEqual(len(valid), 2)
+        self.assertEqual(len(invalid), 1)
+        batch = ExpenseBatch.from_tuples(valid)
+        self.assertLessEqual(max(map(abs, batch.cents)), MAX_CENTS)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from services.message_history_service import MessageHistoryService
+
+CHANNEL_ID = 1
+
+def make_message(message_id: int, content: str | None = None) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=message_id,
+        content=content if content is not None else f"- {message_id};Despesa {message_id};Ana",
+        author=SimpleNamespace(display_name="Ana"),
+        created_at=datetime(2024, 12, 1),
+        channel=SimpleNamespace(id=CHANNEL_ID)
+    )
+
+class FakeChannel:
+    """Canal com `history` como o do discord.py (mais recentes primeiro), que pode pausar no meio da leitura"""
+
+    def __init__(self, messages):
+        self.id = CHANNEL_ID
+        self.messages = list(messages)
+        self.history_calls = []
+        self.pause: asyncio.Event | None = None
+        self.paused = asyncio.Event()
+
+    async def history(self, limit=None, before=None):
+        self.history_calls.append((limit, before.id if before is not None else None))
+        messages = [message for message in self.messages if before is None or message.id < before.id]
+        page = list(reversed(messages))[:limit]
+        if self.pause is not None:
+            # Simula a espera pela resposta da API, durante a qual chegam eventos
+            self.paused.set()
+            await self.pause.wait()
+        for message in page:
+            yield message
+
+    def delete(self, message_id: int) -> None:
+        self.messages = [message for message in self.messages if message.id != message_id]
+
+def ids(parsed_messages):
+    return [message.message_id for message in parsed_messages]
+
+class MessageHistoryServiceTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.service = MessageHistoryService(history_limit=3, max_channels=8)
+
+    async def test_cold_load_reads_history_once_then_answers_from_ledger(self):
+        channel = FakeChannel(make_message(message_id) for message_id in range(1, 5))
+
+        first = await self.service.get_messages(channel)
+        second = await self.service.get_messages(channel)
+
+        self.assertEqual(ids(first), [4, 3, 2])
+        self.assertEqual(ids(second), [4, 3, 2])
+        self.assertEqual(channel.history_calls, [(3, None)])
+        self.assertEqual(first[0].expenses, [(4.0, "Despesa 4", "Ana")])
+
+    async def test_new_message_is_added_and_oldest_trimmed(self):
+        channel = FakeChannel(make_message(message_id) for message_id in range(1, 4))
+        await self.service.get_messages(channel)
+
+        self.service.apply_message(make_message(4))
+
+        self.assertEqual(ids(await self.service.get_messages(channel)), [4, 3, 2])
+        self.assertEqual(len(channel.history_calls), 1)
+
+    async def test_edit_reparses_the_message(self):
+        channel = FakeChannel(make_message(message_id) for message_id in range(1, 3))
+        await self.service.get_messages(channel)
+
+        self.service.apply_edit(CHANNEL_ID, 2, "- 99,90;Editada;Bia\n- errada")
+
+        newest = (await self.service.get_messages(channel))[0]
+        self.assertEqual(newest.expenses, [(99.9, "Editada", "Bia")])
+        self.assertEqual(newest.invalid_lines, ["- errada"])
+
+    async def test_delete_refills_from_older_history(self):
+        channel = FakeChannel(make_message(message_id) for message_id in range(1, 5))
+        await self.service.get_messages(channel)
+
+        channel.delete(3)
+        self.service.apply_delete(CHANNEL_ID, [3])
+
+        # Igual a uma leitura nova de `history(limit=3)`
+        self.assertEqual(ids(await self.service.get_messages(channel)), [4, 2, 1])
+        self.assertEqual(channel.history_calls[-1], (1, 2))
+
+    async def test_delete_in_complete_channel_does_not_read_history(self):
+        channel = FakeChannel(make_message(message_id) for message_id in range(1, 3))
+        await self.service.get_messages(channel)
+
+        self.service.apply_delete(CHANNEL_ID, [1])
+
+        self.assertEqual(ids(await self.service.get_messages(channel)), [2])
+        self.assertEqual(len(channel.history_calls), 1)
+
+    async def test_events_during_load_are_kept(self):
+        channel = FakeChannel(make_message(message_id) for message_id in range(1, 4))
+        channel.pause = asyncio.Event()
+        loading = asyncio.create_task(self.service.get_messages(channel))
+        await channel.paused.wait()
+
+        # Chegam depois da página pedida à API: uma mensagem nova, uma edição e uma exclusão
+        channel.messages.append(make_message(4))
+        self.service.apply_message(make_message(4))
+        self.service.apply_edit(CHANNEL_ID, 3, "- 1;Editada;Bia")
+        self.service.apply_delete(CHANNEL_ID, [2])
+        channel.pause.set()
+
+        messages = await loading
+        self.assertEqual(ids(messages)[:2], [4, 3])
+        self.assertNotIn(2, ids(messages))
+        self.assertEqual(messages[1].expenses, [(1.0, "Editada", "Bia")])
+
+    async def test_events_before_first_use_are_ignored(self):
+        self.service.apply_message(make_message(1))
+        self.service.apply_edit(CHANNEL_ID, 1, "- 5;x;Ana")
+        self.service.apply_delete(CHANNEL_ID, [1])
+
+        channel = FakeChannel([make_message(1)])
+        self.assertEqual(ids(await self.service.get_messages(channel)), [1])
+
+    async def test_mark_stale_forces_a_full_reload(self):
+        channel = FakeChannel(make_message(message_id) for message_id in range(1, 3))
+        await self.service.get_messages(channel)
+
+        self.service.mark_stale()
+        await self.service.get_messages(channel)
+
+        self.assertEqual(channel.history_calls, [(3, None), (3, None)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import aiosqlite
+from database.database import Database
+from database.migrations import MIGRATIONS, Migration, apply_migrations
+from models.expense_batch import ExpenseBatch
+from repositories.sqlite_expense_repository import SQLiteExpenseRepository
+from repositories.sqlite_split_repository import SQLiteSplitRepository
+from services.expense_service import ExpenseService
+
+# Tabelas como eram criadas pelos repositórios antes das migrações
+BASELINE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    value REAL NOT NULL,
+    description TEXT NOT NULL,
+    paid_by TEXT NOT NULL,
+    month INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS splits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    debtor TEXT NOT NULL,
+    creditor TEXT NOT NULL,
+    amount REAL NOT NULL,
+    month INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+GUILD_ID, CHANNEL_ID = 10, 20
+
+class ApplyMigrationsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.conn = await aiosqlite.connect(":memory:")
+        self.addAsyncCleanup(self.conn.close)
+
+    async def table_names(self):
+        cursor = await self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        return [row[0] for row in await cursor.fetchall()]
+
+    async def index_names(self):
+        cursor = await self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%' ORDER BY name")
+        return [row[0] for row in await cursor.fetchall()]
+
+    async def test_fresh_database_gets_every_migration_once(self):
+        self.assertEqual(await apply_migrations(self.conn), [migration.version for migration in MIGRATIONS])
+        self.assertEqual(await apply_migrations(self.conn), [])
+        self.assertEqual(await self.index_names(), ["idx_expenses_scope_month", "idx_splits_scope_month"])
+
+    async def test_baseline_tables_are_upgraded_in_place(self):
+        await self.conn.executescript(BASELINE_SCHEMA)
+        await self.conn.execute(
+            'INSERT INTO expenses (value, description, paid_by, month, year) VALUES (?, ?, ?, ?, ?)',
+            (10.0, "Mercado", "Ana", 11, 2024)
+        )
+        await self.conn.commit()
+
+        await apply_migrations(self.conn)
+
+        cursor = await self.conn.execute('SELECT value, description, guild_id, channel_id FROM expenses')
+        self.assertEqual(await cursor.fetchall(), [(10.0, "Mercado", 0, 0)])
+        self.assertEqual(await self.index_names(), ["idx_expenses_scope_month", "idx_splits_scope_month"])
+
+    async def test_failed_migration_is_rolled_back_and_retried(self):
+        migrations = [
+            Migration(1, "a", ['CREATE TABLE a (x INTEGER)']),
+            Migration(2, "b", ['CREATE TABLE b (x INTEGER)', 'INSERT INTO tabela_inexistente VALUES (1)']),
+        ]
+        with self.assertRaises(sqlite3.OperationalError):
+            await apply_migrations(self.conn, migrations)
+
+        # A migração 1 ficou registrada; da 2 não sobrou nada
+        self.assertEqual(await self.table_names(), ["a", "schema_migrations"])
+
+        migrations[1] = Migration(2, "b", ['CREATE TABLE b (x INTEGER)'])
+        self.assertEqual(await apply_migrations(self.conn, migrations), [2])
+        self.assertEqual(await self.table_names(), ["a", "b", "schema_migrations"])
+
+    async def test_versions_must_be_unique_and_increasing(self):
+        for versions in ([2, 1], [1, 1]):
+            migrations = [Migration(version, "m", []) for version in versions]
+            with self.assertRaises(ValueError):
+                await apply_migrations(self.conn, migrations)
+
+class BaselineUpgradeTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "expenses.db")
+
+        with sqlite3.connect(self.path) as conn:
+            conn.executescript(BASELINE_SCHEMA)
+            conn.executemany(
+                'INSERT INTO expenses (value, description, paid_by, month, year, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (100.0, "Mercado", "Ana", 11, 2024, "2024-11-05T10:00:00"),
+                    (50.0, "Uber", "Bruno", 11, 2024, "2024-11-06T10:00:00"),
+                ]
+            )
+            conn.execute(
+                'INSERT INTO splits (debtor, creditor, amount, month, year, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                ("Bruno", "Ana", 25.0, 11, 2024, "2024-11-07T10:00:00")
+            )
+        conn.close()
+
+        self.database = Database(self.path)
+        await self.database.connect()
+        self.addAsyncCleanup(self.database.close)
+        self.service = ExpenseService(
+            SQLiteExpenseRepository(self.database), SQLiteSplitRepository(self.database), self.database
+        )
+
+    async def test_all_migrations_apply_over_baseline_tables(self):
+        async with self.database.acquire() as conn:
+            cursor = await conn.execute('SELECT version FROM schema_migrations ORDER BY version')
+            versions = [row[0] for row in await cursor.fetchall()]
+            cursor = await conn.execute('SELECT guild_id, channel_id, COUNT(*) FROM expenses GROUP BY 1, 2')
+            scopes = await cursor.fetchall()
+            # Rodar de novo não aplica nada
+            self.assertEqual(await apply_migrations(conn), [])
+
+        self.assertEqual(versions, [migration.version for migration in MIGRATIONS])
+        self.assertEqual(scopes, [(0, 0, 2)])
+
+    async def test_legacy_month_is_loaded_from_any_channel(self):
+        summary = await self.service.get_monthly_summary(GUILD_ID, CHANNEL_ID, 11, 2024)
+
+        self.assertEqual([expense.description for expense in summary['expenses']], ["Mercado", "Uber"])
+        self.assertEqual([(split.debtor, split.creditor, split.amount) for split in summary['splits']], [("Bruno", "Ana", 25.0)])
+
+    async def test_month_saved_in_the_channel_replaces_the_legacy_one(self):
+        await self.service.save_monthly_data(
+            ExpenseBatch.from_tuples([(30.0, "Cinema", "Ana"), (30.0, "Pipoca", "Bruno")]),
+            GUILD_ID, CHANNEL_ID, 11, 2024
+        )
+
+        summary = await self.service.get_monthly_summary(GUILD_ID, CHANNEL_ID, 11, 2024)
+        self.assertEqual([expense.description for expense in summary['expenses']], ["Cinema", "Pipoca"])
+        # Todos quitados no canal: os splits antigos não podem aparecer
+        self.assertEqual(summary['splits'], [])
+
+        other_channel = await self.service.get_monthly_summary(GUILD_ID, CHANNEL_ID + 1, 11, 2024)
+        self.assertEqual(len(other_channel['expenses']), 2)
+
+    async def test_month_without_data_stays_empty(self):
+        summary = await self.service.get_monthly_summary(GUILD_ID, CHANNEL_ID, 12, 2024)
+
+        self.assertEqual(summary['expenses'], [])
+        self.assertEqual(summary['splits'], [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,16 @@
+import unittest
+from commands.play_song import as_url
+
+class AsUrlTest(unittest.TestCase):
+    def test_links_with_and_without_scheme(self):
+        self.assertEqual(as_url("https://youtu.be/abc"), "https://youtu.be/abc")
+        self.assertEqual(as_url("youtu.be/abc"), "https://youtu.be/abc")
+        self.assertEqual(as_url(" www.youtube.com/watch?v=abc "), "https://www.youtube.com/watch?v=abc")
+        self.assertEqual(as_url("music.youtube.com/playlist?list=PL1"), "https://music.youtube.com/playlist?list=PL1")
+
+    def test_song_names_are_not_links(self):
+        for text in ("Garota de Ipanema", "despacito", "???", "", "Thriller.mp3", "ftp://example.com/a", "http://[::1"):
+            self.assertIsNone(as_url(text), text)
+
+if __name__ == "__main__":
+    unittest.main()
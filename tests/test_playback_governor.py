@@ -0,0 +1,148 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from services.music_player import MusicPlayer
+from services.playback_governor import PlaybackGovernor, playback_governor
+
+async def settle():
+    # Deixar as tasks acordadas rodarem até a próxima espera
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+class PlaybackGovernorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.governor = PlaybackGovernor(max_streams=1, max_probes=1, max_waiting=2)
+
+    async def start_waiting(self, guild_id: int, acquired: list) -> asyncio.Task:
+        async def acquire():
+            await self.governor.acquire_stream(guild_id)
+            acquired.append(guild_id)
+
+        task = asyncio.create_task(acquire())
+        await settle()
+        return task
+
+    async def test_free_slot_is_taken_without_waiting(self):
+        self.assertTrue(self.governor.can_admit(1))
+        await self.governor.acquire_stream(1)
+
+        self.assertTrue(self.governor.holds_stream(1))
+        # O servidor mantém a vaga entre as faixas
+        self.assertTrue(self.governor.can_admit(1))
+        await self.governor.acquire_stream(1)
+        self.assertFalse(self.governor.can_admit(2))
+
+    async def test_waiting_guilds_get_the_slot_in_arrival_order(self):
+        acquired = []
+        await self.governor.acquire_stream(1)
+        waiting = [await self.start_waiting(guild_id, acquired) for guild_id in (2, 3)]
+
+        self.assertEqual(self.governor.load().waiting_streams, 2)
+        self.assertFalse(self.governor.can_wait())
+
+        await self.governor.release_stream(1)
+        await settle()
+        self.assertEqual(acquired, [2])
+        await self.governor.release_stream(2)
+        await asyncio.gather(*waiting)
+
+        self.assertEqual(acquired, [2, 3])
+        self.assertEqual(self.governor.load().waiting_streams, 0)
+
+    async def test_free_slot_is_not_taken_ahead_of_waiting_guilds(self):
+        acquired = []
+        await self.governor.acquire_stream(1)
+        waiting = await self.start_waiting(2, acquired)
+
+        await self.governor.release_stream(1)
+        # A vaga já foi sinalizada para o servidor 2, que ainda não rodou
+        self.assertFalse(self.governor.can_admit(3))
+        await waiting
+        self.assertEqual(acquired, [2])
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        acquired = []
+        await self.governor.acquire_stream(1)
+        cancelled = await self.start_waiting(2, acquired)
+        waiting = await self.start_waiting(3, acquired)
+
+        cancelled.cancel()
+        await settle()
+        self.assertEqual(self.governor.load().waiting_streams, 1)
+        self.assertTrue(self.governor.can_wait())
+
+        await self.governor.release_stream(1)
+        await waiting
+        self.assertEqual(acquired, [3])
+        self.assertFalse(self.governor.holds_stream(2))
+
+    async def test_slot_signalled_to_a_cancelled_waiter_is_passed_on(self):
+        acquired = []
+        await self.governor.acquire_stream(1)
+        cancelled = await self.start_waiting(2, acquired)
+        waiting = await self.start_waiting(3, acquired)
+
+        # O servidor 2 é acordado e cancelado antes de ocupar a vaga
+        await self.governor.release_stream(1)
+        cancelled.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+
+        self.assertEqual(acquired, [3])
+        self.assertEqual(self.governor.load().active_streams, 1)
+
+    async def test_probes_are_limited(self):
+        inside = asyncio.Event()
+        release = asyncio.Event()
+
+        async def probe():
+            async with self.governor.probe():
+                inside.set()
+                await release.wait()
+
+        first = asyncio.create_task(probe())
+        await inside.wait()
+        second = asyncio.create_task(probe())
+        await settle()
+
+        load = self.governor.load()
+        self.assertEqual((load.active_probes, load.waiting_probes), (1, 1))
+        release.set()
+        await asyncio.gather(first, second)
+        self.assertEqual(self.governor.load().active_probes, 0)
+
+class FakeVoiceClient:
+    def is_connected(self):
+        return True
+
+    def is_playing(self):
+        return False
+
+    def is_paused(self):
+        return False
+
+    async def disconnect(self, force: bool = False):
+        pass
+
+class PlayerTeardownTest(unittest.IsolatedAsyncioTestCase):
+    async def test_teardown_removes_player_waiting_for_a_slot(self):
+        with patch.object(playback_governor, 'max_streams', 1), patch.object(playback_governor, 'max_waiting', 1):
+            await playback_governor.acquire_stream(1)
+            self.addAsyncCleanup(playback_governor.release_stream, 1)
+
+            player = MusicPlayer(2, history_size=5)
+            player.voice_client = FakeVoiceClient()
+            player.queue.append(("Música", "https://www.youtube.com/watch?v=00000000000"))
+            starting = asyncio.create_task(player.play_next())
+            await settle()
+            self.assertEqual(playback_governor.load().waiting_streams, 1)
+            self.assertFalse(player.is_idle(timeout=0, now=float('inf')))
+
+            await player.teardown()
+
+            self.assertEqual(playback_governor.load().waiting_streams, 0)
+            self.assertTrue(playback_governor.can_wait())
+            self.assertFalse(playback_governor.holds_stream(2))
+            await starting
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from database.sharded_database import ShardedDatabase
+
+class ShardedDatabaseTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.sharded = ShardedDatabase(directory.name, max_open=2)
+        await self.sharded.connect()
+        self.addAsyncCleanup(self.sharded.close)
+
+    def open_guilds(self):
+        # Do usado há mais tempo para o mais recente
+        return list(self.sharded._open)
+
+    async def use(self, guild_id: int) -> None:
+        async with self.sharded.for_guild(guild_id) as database, database.acquire() as conn:
+            await conn.execute('SELECT 1')
+
+    async def test_least_recently_used_shard_is_closed(self):
+        await self.use(1)
+        await self.use(2)
+        await self.use(1)
+        await self.use(3)
+
+        self.assertEqual(self.open_guilds(), [1, 3])
+        self.assertTrue(os.path.exists(self.sharded.shard_path(2)))
+
+    async def test_shard_in_use_is_not_closed(self):
+        async with self.sharded.for_guild(1) as first:
+            await self.use(2)
+            await self.use(3)
+            # O servidor 1 é o usado há mais tempo, mas está emprestado: sai o 2
+            self.assertEqual(self.open_guilds(), [1, 3])
+            async with first.acquire() as conn:
+                await conn.execute('SELECT 1')
+
+        self.assertEqual(self.open_guilds(), [1, 3])
+
+    async def test_limit_is_exceeded_only_while_shards_are_in_use(self):
+        async with self.sharded.for_guild(1), self.sharded.for_guild(2):
+            async with self.sharded.for_guild(3):
+                # Todos estão em uso: o limite é excedido temporariamente
+                self.assertEqual(self.open_guilds(), [1, 2, 3])
+            # O servidor 3 ficou ocioso com o limite excedido: é fechado
+            self.assertEqual(self.open_guilds(), [1, 2])
+
+        self.assertEqual(self.open_guilds(), [1, 2])
+
+    async def test_concurrent_calls_share_one_open(self):
+        opened = []
+        open_shard = self.sharded._open_shard
+
+        async def counting_open_shard(guild_id):
+            opened.append(guild_id)
+            return await open_shard(guild_id)
+
+        self.sharded._open_shard = counting_open_shard
+        databases = []
+
+        async def borrow():
+            async with self.sharded.for_guild(1) as database:
+                databases.append(database)
+
+        await asyncio.gather(*(borrow() for _ in range(5)))
+
+        self.assertEqual(opened, [1])
+        self.assertEqual(len({id(database) for database in databases}), 1)
+
+    async def test_data_survives_eviction(self):
+        async with self.sharded.for_guild(1) as database, database.transaction() as conn:
+            await conn.execute(
+                'INSERT INTO expenses (value, description, paid_by, month, year, guild_id, channel_id) '
+                'VALUES (10, "Mercado", "Ana", 12, 2024, 1, 1)'
+            )
+        await self.use(2)
+        await self.use(3)
+        self.assertNotIn(1, self.open_guilds())
+
+        async with self.sharded.for_guild(1) as database, database.acquire() as conn:
+            cursor = await conn.execute('SELECT description FROM expenses')
+            self.assertEqual(await cursor.fetchall(), [("Mercado",)])
+
+if __name__ == "__main__":
+    unittest.main()
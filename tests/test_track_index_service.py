@@ -0,0 +1,62 @@
+import unittest
+from services.track_index_service import TrackIndex, normalize_title
+
+def titles(results):
+    return [title for title, _ in results]
+
+class TrackIndexSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.index = TrackIndex(max_tracks=10)
+        self.index.add("a", "Garota de Ipanema", "https://youtu.be/a", play_count=1)
+        self.index.add("b", "Águas de Março", "https://youtu.be/b", play_count=5)
+        self.index.add("c", "Chega de Saudade", "https://youtu.be/c", play_count=3)
+        self.index.add("d", "Desafinado", "https://youtu.be/d", play_count=2)
+
+    def test_title_prefix_ranks_before_word_prefix(self):
+        self.index.add("e", "Samba de Uma Nota Só", "https://youtu.be/e", play_count=9)
+        self.index.add("f", "Uma Noite", "https://youtu.be/f", play_count=1)
+
+        # "Uma Noite" começa com o texto; "Samba de Uma Nota Só" só tem uma palavra que começa com ele
+        self.assertEqual(titles(self.index.search("uma no", limit=2)), ["Uma Noite", "Samba de Uma Nota Só"])
+
+    def test_ties_are_broken_by_play_count(self):
+        # Todos têm a palavra "de": o mais tocado vem primeiro
+        self.assertEqual(
+            titles(self.index.search("de", limit=3)),
+            ["Desafinado", "Águas de Março", "Chega de Saudade"]
+        )
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(titles(self.index.search("AGUAS", limit=1)), ["Águas de Março"])
+
+    def test_typos_are_matched_by_trigrams(self):
+        self.assertEqual(titles(self.index.search("saudadi", limit=1)), ["Chega de Saudade"])
+
+    def test_unrelated_text_has_no_match(self):
+        self.assertEqual(self.index.search("xyzw", limit=5), [])
+
+    def test_empty_query_lists_most_played(self):
+        for query in ("", "???", "  "):
+            self.assertEqual(normalize_title(query), "")
+            self.assertEqual(
+                titles(self.index.search(query, limit=2)),
+                ["Águas de Março", "Chega de Saudade"]
+            )
+
+    def test_full_index_drops_least_played(self):
+        index = TrackIndex(max_tracks=2)
+        index.add("a", "Primeira", "https://youtu.be/a", play_count=3)
+        index.add("b", "Segunda", "https://youtu.be/b", play_count=1)
+        index.add("c", "Terceira", "https://youtu.be/c", play_count=2)
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.search("segunda", limit=5), [])
+
+    def test_renamed_track_is_reindexed(self):
+        self.index.add("d", "Desafinado (Ao Vivo)", "https://youtu.be/d2")
+
+        self.assertEqual(self.index.search("desafinado ao", limit=1), [("Desafinado (Ao Vivo)", "https://youtu.be/d2")])
+        self.assertEqual(self.index.search("vivo", limit=5), [("Desafinado (Ao Vivo)", "https://youtu.be/d2")])
+
+if __name__ == "__main__":
+    unittest.main()